@@ -0,0 +1,88 @@
+import time
+
+import pandas as pd
+
+from polytope_feature.datacube.backends.local_gribjump import LocalGribJump
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Select
+
+# Times how long the FDB datacube takes to build the GribJump requests for a sliced tree and to assign the extracted
+# values to it, as the number of fields and the number of latitude lines in the request grow. The fields are served by
+# a LocalGribJump with synthetic values.
+
+
+def archive_axes(steps):
+    return {
+        "class": ["od"],
+        "expver": ["0001"],
+        "levtype": ["sfc"],
+        "stream": ["oper"],
+        "type": ["fc"],
+        "date": ["20240103"],
+        "time": ["0000"],
+        "domain": ["g"],
+        "param": ["167"],
+        "step": [str(step) for step in steps],
+    }
+
+
+options = {
+    "axis_config": [
+        {"axis_name": "step", "transformations": [{"name": "type_change", "type": "int"}]},
+        {"axis_name": "date", "transformations": [{"name": "merge", "other_axis": "time", "linkers": ["T", "00"]}]},
+        {
+            "axis_name": "values",
+            "transformations": [
+                {"name": "mapper", "type": "octahedral", "resolution": 1280, "axes": ["latitude", "longitude"]}
+            ],
+        },
+        {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+        {"axis_name": "longitude", "transformations": [{"name": "cyclic", "range": [0, 360]}]},
+    ],
+    "pre_path": {"class": "od", "expver": "0001", "levtype": "sfc", "stream": "oper", "type": "fc"},
+    # NOTE: step is not compressed, so that each step gives its own fdb request
+    "compressed_axes_config": [
+        "longitude",
+        "latitude",
+        "levtype",
+        "date",
+        "domain",
+        "expver",
+        "param",
+        "class",
+        "stream",
+    ],
+}
+
+
+def time_request_building(num_steps, box_height):
+    steps = list(range(num_steps))
+    # NOTE: the O1280 grid has 6599680 points
+    gj = LocalGribJump(archive_axes(steps), 6599680)
+    API = Polytope(datacube=gj, options=options)
+    request = Request(
+        Select("step", steps),
+        Select("levtype", ["sfc"]),
+        Select("date", [pd.Timestamp("20240103T0000")]),
+        Select("domain", ["g"]),
+        Select("expver", ["0001"]),
+        Select("param", ["167"]),
+        Select("class", ["od"]),
+        Select("stream", ["oper"]),
+        Select("type", ["fc"]),
+        Box(["latitude", "longitude"], [0, 0], [box_height, 1]),
+    )
+    API.datacube.check_branching_axes(request)
+    API.switch_polytope_dim(request)
+    tree = API.slice(API.datacube, request.polytopes())
+    time_start = time.time()
+    API.datacube.get(tree)
+    return time.time() - time_start, gj.num_extracted_fields
+
+
+if __name__ == "__main__":
+    print("num steps, box height (degrees), GribJump requests, time (s)")
+    for num_steps in [1, 10, 50]:
+        for box_height in [1, 5, 20]:
+            elapsed, num_gj_requests = time_request_building(num_steps, box_height)
+            print(f"{num_steps}, {box_height}, {num_gj_requests}, {elapsed:.3f}")
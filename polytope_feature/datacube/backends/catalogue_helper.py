@@ -1,19 +1,29 @@
+import asyncio
+import functools
+import logging
+import re
+import threading
+import time
+
 import requests
-from qubed import Qube
+from requests.adapters import HTTPAdapter
+
+from ...utility.exceptions import HTTPError
 
 url = "https://catalogue.lumi.apps.dte.destination-earth.eu/api/v2/select/"
 
+# (connect, read) timeouts of the catalogue requests, in seconds
+CATALOGUE_TIMEOUT = (5, 60)
+# How long a catalogue response is used before it is revalidated, if the catalogue does not say, in seconds
+CATALOGUE_TTL = 300
+
 
 def change_datetime_to_str(date):
     return date.strftime("%Y%m%d")
 
 
-def find_axes_from_qube(pre_path):
-    response = requests.get(url, params=pre_path)
-    if response.ok:
-        qube_json = response.json()
-    else:
-        print("Error querying catalogue:", response.status_code, response.text)
+def qube_to_axes(qube_json):
+    from qubed import Qube
 
     qube = Qube.from_json(qube_json)
 
@@ -36,3 +46,115 @@ def find_axes_from_qube(pre_path):
 
     qube_axes = dict(reversed(list(qube_axes.items())))
     return qube_axes
+
+
+class _CatalogueEntry:
+    __slots__ = ("value", "etag", "last_modified", "expires_at")
+
+    def __init__(self, value, etag, last_modified, expires_at):
+        self.value = value
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+
+
+class CatalogueClient:
+    """Client of the catalogue which reuses its connections and caches the parsed responses.
+
+    The connections are kept in a pool shared by all the datacubes of the process, so that the catalogue does not
+    cost a TLS handshake per request. The parsed responses are cached per pre_path until their max-age, or ttl
+    seconds, have passed, after which they are revalidated with their ETag or Last-Modified date and only parsed again
+    if the catalogue changed. If the catalogue cannot be reached, the last response is used.
+    """
+
+    def __init__(self, url, ttl=CATALOGUE_TTL, timeout=CATALOGUE_TIMEOUT, pool_size=10):
+        self.url = url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._key_locks = {}
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def select(self, pre_path, parse=qube_to_axes):
+        key = (tuple(sorted((k, str(v)) for k, v in pre_path.items())), parse)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # NOTE: identical lookups wait for each other, so that only one of them queries the catalogue
+        with key_lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and time.monotonic() < entry.expires_at:
+                return entry.value
+
+            headers = {}
+            if entry is not None and entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry is not None and entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+            try:
+                response = self.session.get(self.url, params=pre_path, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                if entry is None:
+                    raise
+                logging.warning("Error querying catalogue, using its last response: %s", e)
+                return entry.value
+
+            if response.status_code == 304 and entry is not None:
+                entry.expires_at = self._expires_at(response)
+                return entry.value
+            if not response.ok:
+                logging.error("Error querying catalogue: %s %s", response.status_code, response.text)
+                if entry is None:
+                    raise HTTPError(response.status_code, response.text)
+                return entry.value
+
+            value = parse(response.json())
+            self._entries[key] = _CatalogueEntry(
+                value,
+                response.headers.get("ETag", None),
+                response.headers.get("Last-Modified", None),
+                self._expires_at(response),
+            )
+            return value
+
+    async def select_async(self, pre_path, parse=qube_to_axes):
+        # NOTE: the blocking lookup runs on a worker thread, so that it shares the connections and cache of select
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.select, pre_path, parse))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _expires_at(self, response):
+        ttl = self.ttl
+        max_age = re.search(r"max-age=(\d+)", response.headers.get("Cache-Control", ""))
+        if max_age is not None:
+            ttl = int(max_age.group(1))
+        return time.monotonic() + ttl
+
+
+catalogue = CatalogueClient(url)
+
+
+def find_axes_from_qube(pre_path):
+    qube_axes = catalogue.select(pre_path)
+    # NOTE: the cached axes are shared, so return a copy which the datacube can modify
+    return {key: list(vals) for key, vals in qube_axes.items()}
+
+
+async def find_axes_from_qube_async(pre_path):
+    qube_axes = await catalogue.select_async(pre_path)
+    return {key: list(vals) for key, vals in qube_axes.items()}
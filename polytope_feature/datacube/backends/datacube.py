@@ -36,6 +36,9 @@ class Datacube(ABC):
         self.unwanted_path = {}
         self.compressed_axes = compressed_axes_options
         self.grid_md5_hash = None
+        self.grid_key = None
+        # indexes of the axes which do not depend on the path to them, by axis name
+        self.path_independent_indexes = {}
 
     @abstractmethod
     def get(self, requests: TensorIndexTree, context: Dict) -> Any:
@@ -72,6 +75,7 @@ class Datacube(ABC):
             for compressed_grid_axis in transformation.compressed_grid_axes:
                 self.compressed_grid_axes.append(compressed_grid_axis)
                 self.grid_md5_hash = transformation.md5_hash
+                self.grid_key = transformation.grid_key
                 self.grid_transformation = transformation
         if len(final_axis_names) > 1:
             self.coupled_axes.append(final_axis_names)
@@ -124,10 +128,10 @@ class Datacube(ABC):
         return index in indexes
 
     def fit_path(self, path):
-        for key in path.keys():
-            if key not in self.complete_axes and key not in self.fake_axes:
-                path.pop(key)
-        return path
+        # NOTE: the path is either a mapping or a tuple of (axis name, values) pairs, like TensorIndexTree.path, and is
+        # left untouched
+        items = path.items() if hasattr(path, "items") else path
+        return {key: values for key, values in items if key in self.complete_axes or key in self.fake_axes}
 
     def get_indices(self, path: DatacubePath, axis, lower, upper, method=None):
         """
@@ -169,6 +173,13 @@ class Datacube(ABC):
         alternative_axes=[],
         use_catalogue=False,
         context=None,
+        range_gap_tolerance=0,
+        extract_chunk_size=0,
+        extract_max_workers=1,
+        coalesce_extracts=False,
+        extract_cache_size=0,
+        extract_cache_dir=None,
+        extract_cache_disk_size=None,
     ):
         # TODO: get the configs as None for pre-determined value and change them to empty dictionary inside the function
         if type(datacube).__name__ == "DataArray":
@@ -181,7 +192,17 @@ class Datacube(ABC):
                 context,
             )
             return xadatacube
-        if type(datacube).__name__ == "GribJump":
+        if type(datacube).__name__ == "NumpyArray":
+            from .numpy import NumpyDatacube
+
+            npdatacube = NumpyDatacube(
+                datacube,
+                axis_options,
+                compressed_axes_options,
+                context,
+            )
+            return npdatacube
+        if type(datacube).__name__ in ("GribJump", "LocalGribJump"):
             from .fdb import FDBDatacube
 
             fdbdatacube = FDBDatacube(
@@ -192,6 +213,13 @@ class Datacube(ABC):
                 alternative_axes,
                 context,
                 use_catalogue,
+                range_gap_tolerance,
+                extract_chunk_size,
+                extract_max_workers,
+                coalesce_extracts,
+                extract_cache_size,
+                extract_cache_dir,
+                extract_cache_disk_size,
             )
             return fdbdatacube
         if type(datacube).__name__ == "MockDatacube":
@@ -0,0 +1,190 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .extract_coalescer import extract_key
+
+
+class CachedResult:
+    """Stands in for a GribJump extraction result, holding one read-only array of values per range."""
+
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = values
+
+
+class ExtractCache:
+    """Least recently used cache of the values extracted from GribJump.
+
+    The values are keyed by the (request, ranges, md5 hash) sent to GribJump, and are kept in memory up to max_bytes.
+    If a cache_dir is given, the values evicted from memory are written there and memory-mapped back when they are
+    requested again, up to max_disk_bytes on disk (without limit if None). The files left in cache_dir are reused by
+    later processes, and cache_dir can be shared by the workers of a server: the limit applies to the whole directory,
+    which is sized from disk when the cache is created and whenever a file is written to it, and the least recently used
+    files of any process are removed first.
+    Archived data never changes, so the values are never invalidated. Extractions which found no data are not cached,
+    as the data may be archived later.
+    """
+
+    def __init__(self, max_bytes, cache_dir=None, max_disk_bytes=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._num_bytes = 0
+        self._disk_entries = OrderedDict()
+        self._num_disk_bytes = 0
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            if max_disk_bytes is not None:
+                self._scan_disk()
+                self._evict_from_disk()
+
+    def extract(self, extract, gj_requests, context=None):
+        keys = [extract_key(gj_request) for gj_request in gj_requests]
+        results = [self.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        logging.debug("Found %s of %s requests in the extract cache", len(keys) - len(missing), len(keys))
+        if missing:
+            extracted = extract([gj_requests[i] for i in missing], context)
+            for i, result in zip(missing, extracted):
+                results[i] = result
+                if len(result.values) != 0:
+                    self.put(keys[i], result.values)
+        return results
+
+    def get(self, key):
+        with self._lock:
+            values = self._entries.get(key, None)
+            if values is not None:
+                self._entries.move_to_end(key)
+                return self._result(key, values)
+            if self.cache_dir is None:
+                return None
+            path = self._disk_path(key)
+            try:
+                # NOTE: the values stay on disk and are only read when they are used
+                values = np.load(path, mmap_mode="r")
+            except FileNotFoundError:
+                # the file was never written, or was evicted by another process
+                self._remove_disk_entry(path)
+                return None
+            if path in self._disk_entries:
+                self._disk_entries.move_to_end(path)
+            else:
+                # NOTE: the values follow the header of the file, which may already have been evicted by another process
+                self._add_disk_entry(path, values.offset + values.nbytes)
+            try:
+                # the modification time orders the files of all the processes sharing the directory
+                os.utime(path)
+            except FileNotFoundError:
+                pass
+            return self._result(key, values)
+
+    def put(self, key, range_values):
+        values = np.concatenate([np.asarray(v, dtype=np.float64) for v in range_values])
+        values.flags.writeable = False
+        with self._lock:
+            if key in self._entries:
+                return
+            if values.nbytes <= self.max_bytes:
+                self._entries[key] = values
+                self._num_bytes += values.nbytes
+            else:
+                self._write_to_disk(key, values)
+            while self._num_bytes > self.max_bytes:
+                evicted_key, evicted_values = self._entries.popitem(last=False)
+                self._num_bytes -= evicted_values.nbytes
+                self._write_to_disk(evicted_key, evicted_values)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._num_bytes = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def num_bytes(self):
+        return self._num_bytes
+
+    @staticmethod
+    def _result(key, values):
+        # split the values back into the ranges of the request
+        range_ends = np.cumsum([end - start for start, end in key[1]])
+        return CachedResult(np.split(values, range_ends[:-1]))
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, hashlib.sha1(repr(key).encode()).hexdigest() + ".npy")
+
+    def _scan_disk(self):
+        # Find the files of the cache directory, including those written by other processes, from the least recently
+        # used one
+        files = []
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".npy"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        files.sort()
+        self._disk_entries = OrderedDict((path, num_bytes) for _, path, num_bytes in files)
+        self._num_disk_bytes = sum(self._disk_entries.values())
+
+    def _add_disk_entry(self, path, num_bytes):
+        self._disk_entries[path] = num_bytes
+        self._num_disk_bytes += num_bytes
+
+    def _remove_disk_entry(self, path):
+        self._num_disk_bytes -= self._disk_entries.pop(path, 0)
+
+    def _evict_from_disk(self):
+        while self._num_disk_bytes > self.max_disk_bytes:
+            evicted_path, evicted_bytes = self._disk_entries.popitem(last=False)
+            self._num_disk_bytes -= evicted_bytes
+            try:
+                os.remove(evicted_path)
+            except FileNotFoundError:
+                pass
+
+    def _write_to_disk(self, key, values):
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        if path in self._disk_entries:
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+        # NOTE: other processes may read the cache directory, so the file only appears once it is complete
+        os.replace(tmp_path, path)
+        if self.max_disk_bytes is None:
+            self._add_disk_entry(path, os.path.getsize(path))
+        else:
+            # NOTE: the other processes sharing the directory write to it too, so it is sized again from disk
+            self._scan_disk()
+            self._evict_from_disk()
+
+
+_extract_caches = {}
+_extract_caches_lock = threading.Lock()
+
+
+def get_extract_cache(max_bytes, cache_dir=None, max_disk_bytes=None):
+    """Return the extract cache of the process with these settings, so that it is shared between datacubes."""
+    with _extract_caches_lock:
+        key = (max_bytes, cache_dir, max_disk_bytes)
+        if key not in _extract_caches:
+            _extract_caches[key] = ExtractCache(max_bytes, cache_dir, max_disk_bytes)
+        return _extract_caches[key]
@@ -0,0 +1,82 @@
+import threading
+
+
+class _Extraction:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def extract_key(gj_request):
+    """Return a hashable key identifying a (request, ranges, md5 hash) GribJump request."""
+    request, ranges, md5_hash = gj_request
+    return (tuple(sorted((key, str(value)) for key, value in request.items())), tuple(map(tuple, ranges)), md5_hash)
+
+
+class ExtractCoalescer:
+    """Process-wide store for the GribJump extractions in flight.
+
+    When several datacubes extract the same (request, ranges, md5 hash) at the same time, for example because many
+    users ask for the latest forecast at once, only the first one sends it to GribJump and the others wait for its
+    result. The results are shared between the waiting datacubes and must therefore never be modified; the FDB
+    datacube copies them into the results of its own tree.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def extract(self, extract, gj_requests, context=None):
+        # Register as the owner of every request which nobody is extracting yet, extract these, and then wait for the
+        # ones extracted by others
+        extractions = []
+        owned = {}
+        with self._lock:
+            for i, gj_request in enumerate(gj_requests):
+                key = extract_key(gj_request)
+                extraction = self._in_flight.get(key, None)
+                if extraction is None:
+                    extraction = _Extraction()
+                    self._in_flight[key] = extraction
+                    owned[key] = i
+                extractions.append(extraction)
+
+        if owned:
+            owned_extractions = [extractions[i] for i in owned.values()]
+            try:
+                results = list(extract([gj_requests[i] for i in owned.values()], context))
+                if len(results) != len(owned_extractions):
+                    # NOTE: the results cannot be matched to the requests, so the whole group fails
+                    raise ValueError(
+                        f"GribJump returned {len(results)} results for {len(owned_extractions)} extracted requests"
+                    )
+                for extraction, result in zip(owned_extractions, results):
+                    extraction.result = result
+            except BaseException as e:
+                for extraction in owned_extractions:
+                    extraction.error = e
+                raise
+            finally:
+                with self._lock:
+                    for key in owned:
+                        self._in_flight.pop(key, None)
+                for extraction in owned_extractions:
+                    extraction.done.set()
+
+        results = []
+        for extraction in extractions:
+            extraction.done.wait()
+            if extraction.error is not None:
+                raise extraction.error
+            results.append(extraction.result)
+        return results
+
+    def __len__(self):
+        with self._lock:
+            return len(self._in_flight)
+
+
+extract_coalescer = ExtractCoalescer()
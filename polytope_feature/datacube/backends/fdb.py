@@ -1,11 +1,17 @@
 import logging
-import operator
+import math
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from copy import deepcopy
-from itertools import product
+from functools import partial
+from itertools import chain, islice, product
+
+import numpy as np
 
 from ...utility.exceptions import BadGridError, BadRequestError, GribJumpNoIndexError
-from ...utility.geometry import nearest_pt
+from ...utility.geometry import nearest_pt_indexes
 from .datacube import Datacube, TensorIndexTree
+from .extract_cache import get_extract_cache
+from .extract_coalescer import extract_coalescer
 
 
 class FDBDatacube(Datacube):
@@ -18,8 +24,27 @@ class FDBDatacube(Datacube):
         alternative_axes=[],
         context=None,
         use_catalogue=False,
+        range_gap_tolerance=0,
+        extract_chunk_size=0,
+        extract_max_workers=1,
+        coalesce_extracts=False,
+        extract_cache_size=0,
+        extract_cache_dir=None,
+        extract_cache_disk_size=None,
     ):
         self.use_catalogue = use_catalogue
+        # Ranges sent to GribJump which are at most this many grid points apart are fetched as a single range
+        self.range_gap_tolerance = range_gap_tolerance
+        # If set, the requests are sent to GribJump in chunks of this many fields, on up to extract_max_workers threads
+        self.extract_chunk_size = extract_chunk_size
+        self.extract_max_workers = extract_max_workers
+        # If set, identical requests extracted by several datacubes of the process at the same time are only sent once
+        self.coalesce_extracts = coalesce_extracts
+        # If set, the extracted values are cached in memory up to extract_cache_size bytes, and then in
+        # extract_cache_dir if given
+        self.extract_cache = None
+        if extract_cache_size or extract_cache_dir is not None:
+            self.extract_cache = get_extract_cache(extract_cache_size, extract_cache_dir, extract_cache_disk_size)
         if config is None:
             config = {}
         if context is None:
@@ -93,7 +118,7 @@ class FDBDatacube(Datacube):
     def find_point_cloud(self):
         # find the point cloud of irregular grid if it exists
         if self.grid_transformation.is_irregular:
-            return self.grid_transformation._final_transformation.grid_latlon_points()
+            return self.grid_transformation.grid_latlon_points()
 
     def check_branching_axes(self, request):
         polytopes = request.polytopes()
@@ -156,9 +181,11 @@ class FDBDatacube(Datacube):
             for key in compressed_request[0].keys():
                 interm_branch_tuple_values.append(compressed_request[0][key])
             request_combis = product(*interm_branch_tuple_values)
+            num_fields = math.prod(len(values) for values in interm_branch_tuple_values)
+            result_layout = self.allocate_fdb_results(fdb_requests_decoding_info[j], num_fields)
 
             # Need to extract the possible requests and add them to the right nodes
-            for combi in request_combis:
+            for field_idx, combi in enumerate(request_combis):
                 uncompressed_request = {}
                 for i, key in enumerate(compressed_request[0].keys()):
                     uncompressed_request[key] = combi[i]
@@ -168,14 +195,30 @@ class FDBDatacube(Datacube):
                     self.grid_md5_hash,
                 )
                 complete_list_complete_uncompressed_requests.append(complete_uncompressed_request)
-                complete_fdb_decoding_info.append(fdb_requests_decoding_info[j])
+                complete_fdb_decoding_info.append((result_layout, field_idx))
 
         if logging.root.level <= logging.DEBUG:
             printed_list_to_gj = complete_list_complete_uncompressed_requests[::1000]
             logging.debug("The requests we give GribJump are: %s", printed_list_to_gj)
         logging.info("Requests given to GribJump extract for %s", context)
+        if self.extract_chunk_size and len(complete_list_complete_uncompressed_requests) > self.extract_chunk_size:
+            self.extract_in_chunks(complete_list_complete_uncompressed_requests, complete_fdb_decoding_info, context)
+        else:
+            iterator = self.gj_extract(complete_list_complete_uncompressed_requests, context)
+            self.assign_fdb_output_to_nodes(iterator, complete_fdb_decoding_info)
+        logging.info("Requests extracted from GribJump for %s", context)
+
+    def gj_extract(self, gj_requests, context=None):
+        extract = self._gj_extract
+        if self.coalesce_extracts:
+            extract = partial(extract_coalescer.extract, extract)
+        if self.extract_cache is not None:
+            extract = partial(self.extract_cache.extract, extract)
+        return extract(gj_requests, context)
+
+    def _gj_extract(self, gj_requests, context=None):
         try:
-            iterator = self.gj.extract(complete_list_complete_uncompressed_requests, context)
+            return self.gj.extract(gj_requests, context)
         except Exception as e:
             if "BadValue: Grid hash mismatch" in str(e):
                 logging.info("Error is: %s", e)
@@ -186,8 +229,36 @@ class FDBDatacube(Datacube):
             else:
                 raise e
 
-        logging.info("Requests extracted from GribJump for %s", context)
-        self.assign_fdb_output_to_nodes(iterator, complete_fdb_decoding_info)
+    def extract_in_chunks(self, gj_requests, fdb_decoding_info, context=None):
+        # Each chunk is extracted on a worker thread and its results are assigned to the nodes as soon as it is done.
+        # At most twice as many chunks as there are workers are submitted at any time, so that only the results of
+        # these chunks are held in memory.
+        chunk_size = self.extract_chunk_size
+        chunk_starts = iter(range(0, len(gj_requests), chunk_size))
+        max_in_flight = 2 * max(self.extract_max_workers, 1)
+
+        def extract_chunk(chunk_start):
+            # NOTE: the GribJump output is read on the worker too, as it may be lazy
+            return list(self.gj_extract(gj_requests[chunk_start : chunk_start + chunk_size], context))
+
+        with ThreadPoolExecutor(max_workers=max(self.extract_max_workers, 1)) as executor:
+            in_flight = {}
+            for chunk_start in islice(chunk_starts, max_in_flight):
+                in_flight[executor.submit(extract_chunk, chunk_start)] = chunk_start
+            try:
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        chunk_start = in_flight.pop(future)
+                        self.assign_fdb_output_to_nodes(
+                            future.result(), fdb_decoding_info[chunk_start : chunk_start + chunk_size]
+                        )
+                        logging.debug("Assigned the GribJump output of requests %s onwards", chunk_start)
+                        for next_chunk_start in islice(chunk_starts, 1):
+                            in_flight[executor.submit(extract_chunk, next_chunk_start)] = next_chunk_start
+            finally:
+                for future in in_flight:
+                    future.cancel()
 
     def get_fdb_requests(
         self,
@@ -226,42 +297,36 @@ class FDBDatacube(Datacube):
                     sorted_request_ranges,
                     fdb_node_ranges,
                 ) = self.sort_fdb_request_ranges(current_start_idxs, lat_length, fdb_node_ranges)
-                fdb_requests.append((path, sorted_request_ranges))
-                fdb_requests_decoding_info.append((original_indices, fdb_node_ranges))
+                coalesced_request_ranges, value_sources = self.coalesce_fdb_request_ranges(sorted_request_ranges)
+                fdb_requests.append((path, coalesced_request_ranges))
+                fdb_requests_decoding_info.append(
+                    (original_indices, fdb_node_ranges, sorted_request_ranges, value_sources)
+                )
 
             # Otherwise remap the path for this key and iterate again over children
             else:
                 for c in requests.children:
                     self.get_fdb_requests(c, fdb_requests, fdb_requests_decoding_info, leaf_path)
 
-    def remove_duplicates_in_request_ranges(self, fdb_node_ranges, current_start_idxs):
-        seen_indices = set()
-        new_fdb_node_ranges = []
-        new_current_start_idxs = []
-        for i, idxs_list in enumerate(current_start_idxs):
-            new_idx_group = []
-            new_fdb_group = []
-            for k, sub_lat_idxs in enumerate(idxs_list):
-                actual_fdb_node = fdb_node_ranges[i][k]
-                original_vals = []
-                filtered_idxs = []
-                for j, idx in enumerate(sub_lat_idxs):
-                    if idx not in seen_indices:
-                        seen_indices.add(idx)
-                        filtered_idxs.append(idx)
-                        original_vals.append(actual_fdb_node[0].values[j])
-                if filtered_idxs:
-                    # keep only if we had values still
-                    actual_fdb_node[0].values = tuple(original_vals)
-                    new_idx_group.append(filtered_idxs)
-                    new_fdb_group.append(actual_fdb_node)
-                else:
-                    # remove this node because we removed all values
-                    actual_fdb_node[0].remove_branch()
-            new_current_start_idxs.append(new_idx_group)
-            new_fdb_node_ranges.append(new_fdb_group)
-
-        return new_fdb_node_ranges, new_current_start_idxs
+    def remove_duplicates_in_request_ranges(self, fdb_range_nodes, start_idxs, node_ids):
+        # Only keep the first occurrence of each index, and remove the other values from their nodes
+        _, first_occurrences = np.unique(start_idxs, return_index=True)
+        if len(first_occurrences) == len(start_idxs):
+            return (start_idxs, node_ids)
+        is_kept = np.zeros(len(start_idxs), dtype=bool)
+        is_kept[first_occurrences] = True
+        node_offsets = np.searchsorted(node_ids, np.arange(len(fdb_range_nodes)))
+        for node_id in np.unique(node_ids[~is_kept]).tolist():
+            actual_fdb_node = fdb_range_nodes[node_id]
+            node_is_kept = is_kept[node_offsets[node_id] : node_offsets[node_id] + len(actual_fdb_node[0].values)]
+            if node_is_kept.any():
+                # keep only if we had values still
+                original_vals = actual_fdb_node[0].values
+                actual_fdb_node[0].values = tuple(val for val, kept in zip(original_vals, node_is_kept) if kept)
+            else:
+                # remove this node because we removed all values
+                actual_fdb_node[0].remove_branch()
+        return (start_idxs[is_kept], node_ids[is_kept])
 
     def nearest_lat_lon_search(self, requests):
         if len(self.nearest_search) != 0:
@@ -281,45 +346,41 @@ class FDBDatacube(Datacube):
             nearest_pts_k = self.nearest_search.get((first_ax_name, second_ax_name), None)
             if nearest_pts_k is None:
                 nearest_pts_k = self.nearest_search.get((second_ax_name, first_ax_name), None)
-                for i, pt in enumerate(nearest_pts_k[0]):
-                    nearest_pts_k[0][i] = [pt[1], pt[0]]
+                nearest_pts = [[pt[1], pt[0]] for pt in nearest_pts_k[0]]
+            else:
+                nearest_pts = nearest_pts_k[0]
 
             k = nearest_pts_k[1]
             if k != 1 and not self.grid_transformation.is_irregular:
                 print("k nearest neighbour not supported in hullslicer, defaulting to nearest neighbour.")
                 k = 1
 
-            transformed_nearest_pts = []
-            for point in nearest_pts_k[0]:
-                transformed_nearest_pts.append([point[0], second_ax._remap_val_to_axis_range(point[1])])
+            transformed_nearest_pts = [
+                [point[0], second_ax._remap_val_to_axis_range(point[1])] for point in nearest_pts
+            ]
 
-            found_latlon_pts = []
-            for lat_child in requests.children:
-                for lon_child in lat_child.children:
-                    found_latlon_pts.append([lat_child.values, lon_child.values])
+            found_latlon_pts = [
+                (first_val, second_val)
+                for lat_child in requests.children
+                for lon_child in lat_child.children
+                for first_val in lat_child.values
+                for second_val in lon_child.values
+            ]
 
             # now find the nearest lat lon to the points requested
-            nearest_latlons = []
-            for pt in transformed_nearest_pts:
-                nearest_latlon = nearest_pt(found_latlon_pts, pt, k)
-                nearest_latlons.extend(nearest_latlon)
+            nearest_idxs = nearest_pt_indexes(found_latlon_pts, transformed_nearest_pts, k)
+            nearest_latlons = set(found_latlon_pts[idx] for idx in np.unique(nearest_idxs))
 
             # need to remove the branches that do not fit
-            lat_children_values = [child.values for child in requests.children]
-            for i in range(len(lat_children_values)):
-                lat_child_val = lat_children_values[i]
-                lat_child = [child for child in requests.children if child.values == lat_child_val][0]
-                if lat_child.values not in [(latlon[0],) for latlon in nearest_latlons]:
+            nearest_lats = set(latlon[0] for latlon in nearest_latlons)
+            for lat_child in list(requests.children):
+                if not any(lat_val in nearest_lats for lat_val in lat_child.values):
                     lat_child.remove_branch()
-                else:
-                    possible_lons = [latlon[1] for latlon in nearest_latlons if (latlon[0],) == lat_child.values]
-                    lon_children_values = [child.values for child in lat_child.children]
-                    for j in range(len(lon_children_values)):
-                        lon_child_val = lon_children_values[j]
-                        lon_child = [child for child in lat_child.children if child.values == lon_child_val][0]
-                        for value in lon_child.values:
-                            if value not in possible_lons:
-                                lon_child.remove_compressed_branch(value)
+                    continue
+                for lon_child in list(lat_child.children):
+                    for value in lon_child.values:
+                        if not any((lat_val, value) in nearest_latlons for lat_val in lat_child.values):
+                            lon_child.remove_compressed_branch(value)
 
     def get_2nd_last_values(self, requests, leaf_path=None):
         if leaf_path is None:
@@ -329,15 +390,9 @@ class FDBDatacube(Datacube):
         self.nearest_lat_lon_search(requests)
 
         lat_length = len(requests.children)
-        current_start_idxs = [False] * lat_length
-        fdb_node_ranges = [False] * lat_length
-        for i in range(len(requests.children)):
-            lat_child = requests.children[i]
-            lon_length = len(lat_child.children)
-            current_start_idxs[i] = [None] * lon_length
-            fdb_node_ranges[i] = [[TensorIndexTree.root for y in range(lon_length)] for x in range(lon_length)]
-            current_start_idx = deepcopy(current_start_idxs[i])
-            fdb_range_nodes = deepcopy(fdb_node_ranges[i])
+        current_start_idxs = [None] * lat_length
+        fdb_node_ranges = [None] * lat_length
+        for i, lat_child in enumerate(requests.children):
             key_value_path = {lat_child.axis.name: lat_child.values}
             ax = lat_child.axis
             key_value_path, leaf_path, self.unwanted_path = ax.unmap_path_key(
@@ -347,16 +402,15 @@ class FDBDatacube(Datacube):
             (
                 current_start_idxs[i],
                 fdb_node_ranges[i],
-            ) = self.get_last_layer_before_leaf(lat_child, leaf_path, current_start_idx, fdb_range_nodes)
+            ) = self.get_last_layer_before_leaf(lat_child, leaf_path)
 
-        leaf_path_copy = deepcopy(leaf_path)
-        leaf_path_copy.pop("values", None)
-        leaf_path_copy.pop("index")
+        # NOTE: the values in the path are never modified in place, so a shallow copy is enough
+        leaf_path_copy = {key: value for key, value in leaf_path.items() if key not in ("values", "index")}
         return (leaf_path_copy, current_start_idxs, fdb_node_ranges, lat_length)
 
-    def get_last_layer_before_leaf(self, requests, leaf_path, current_idx, fdb_range_n):
-        current_idx = [[] for i in range(len(requests.children))]
-        fdb_range_n = [[] for i in range(len(requests.children))]
+    def get_last_layer_before_leaf(self, requests, leaf_path):
+        current_idx = [None] * len(requests.children)
+        fdb_range_n = [None] * len(requests.children)
         for i, c in enumerate(requests.children):
             # now c are the leaves of the initial tree
             key_value_path = {c.axis.name: c.values}
@@ -366,79 +420,128 @@ class FDBDatacube(Datacube):
                 key_value_path, leaf_path, self.unwanted_path
             )
             # TODO: change this to accommodate non consecutive indexes being compressed too
-            current_idx[i].extend(key_value_path["values"])
-            fdb_range_n[i].append(c)
-        assert len(current_idx) == len(fdb_range_n)
-        for i, node in enumerate(fdb_range_n):
-            assert len(node[0].values) == len(current_idx[i])
+            current_idx[i] = key_value_path["values"]
+            fdb_range_n[i] = [c]
+            assert len(c.values) == len(current_idx[i])
         return (current_idx, fdb_range_n)
 
+    def allocate_fdb_results(self, fdb_request_decoding_info, num_fields):
+        # All the results of the nodes below one fdb request are stored in a single NaN-initialised buffer, in which
+        # each node owns a contiguous slice holding its values for each field in turn.
+        # Returns the buffer, and the position in the buffer of each value of the first field's ranges together with
+        # how far these positions move for each next field, and where these values are in the GribJump output.
+        (
+            original_indices,
+            fdb_node_ranges,
+            sorted_request_ranges,
+            value_sources,
+        ) = fdb_request_decoding_info
+        sorted_fdb_range_nodes = [fdb_node_ranges[i][0] for i in original_indices]
+
+        node_offsets = {}
+        total_size = 0
+        for n in sorted_fdb_range_nodes:
+            if id(n) not in node_offsets:
+                node_offsets[id(n)] = total_size
+                total_size += num_fields * len(n.values)
+        buffer = np.full(total_size, np.nan)
+
+        range_positions = []
+        range_strides = []
+        node_positions = {}
+        for n, request_range in zip(sorted_fdb_range_nodes, sorted_request_ranges):
+            range_length = request_range[1] - request_range[0]
+            start = node_offsets[id(n)] + node_positions.get(id(n), 0)
+            node_positions[id(n)] = node_positions.get(id(n), 0) + range_length
+            range_positions.append(np.arange(start, start + range_length, dtype=np.int64))
+            range_strides.append(np.full(range_length, len(n.values), dtype=np.int64))
+
+        for n in sorted_fdb_range_nodes:
+            offset = node_offsets[id(n)]
+            # NOTE: this is a view on the buffer, so the results are written straight into the nodes
+            n.result = buffer[offset : offset + num_fields * len(n.values)]
+
+        if len(range_positions) == 0:
+            return (buffer, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), value_sources)
+        return (buffer, np.concatenate(range_positions), np.concatenate(range_strides), value_sources)
+
     def assign_fdb_output_to_nodes(self, output_iterator, fdb_requests_decoding_info):
         for k, result in enumerate(output_iterator):
-            (
-                original_indices,
-                fdb_node_ranges,
-            ) = fdb_requests_decoding_info[k]
-            sorted_fdb_range_nodes = [fdb_node_ranges[i] for i in original_indices]
-            for i in range(len(sorted_fdb_range_nodes)):
-                n = sorted_fdb_range_nodes[i][0]
-                if len(result.values) == 0:
-                    # If we are here, no data was found for this path in the fdb
-                    none_array = [None] * len(n.values)
-                    n.result.extend(none_array)
-                else:
-                    n.result.extend(result.values[i])
+            (buffer, positions, strides, value_sources), field_idx = fdb_requests_decoding_info[k]
+            if len(result.values) == 0:
+                # If we are here, no data was found for this path in the fdb and the results stay NaN
+                continue
+            values = np.concatenate([np.asarray(range_values, dtype=np.float64) for range_values in result.values])
+            if value_sources is not None:
+                # Drop the values which were only fetched to fill the gaps between coalesced ranges
+                values = values[value_sources]
+            buffer[positions + field_idx * strides] = values
+
+    def coalesce_fdb_request_ranges(self, sorted_request_ranges):
+        # GribJump decodes each range separately, so ranges which touch or are separated by a small gap, for example
+        # on consecutive latitude lines of a box, are merged into a single range.
+        # Returns the merged ranges and, if values in the gaps are fetched too, the position in the merged output of
+        # each value of the sorted ranges.
+        coalesced_ranges = []
+        value_sources = []
+        num_values = 0
+        # position in the GribJump output of the first value of the last merged range
+        coalesced_offset = 0
+        for start, end in sorted_request_ranges:
+            if coalesced_ranges and start - coalesced_ranges[-1][1] <= self.range_gap_tolerance:
+                coalesced_ranges[-1] = (coalesced_ranges[-1][0], end)
+            else:
+                if coalesced_ranges:
+                    coalesced_offset += coalesced_ranges[-1][1] - coalesced_ranges[-1][0]
+                coalesced_ranges.append((start, end))
+            offset = coalesced_offset + start - coalesced_ranges[-1][0]
+            value_sources.append(np.arange(offset, offset + end - start, dtype=np.int64))
+            num_values += end - start
+        num_fetched = sum(end - start for start, end in coalesced_ranges)
+        if num_fetched == num_values:
+            return (tuple(coalesced_ranges), None)
+        return (tuple(coalesced_ranges), np.concatenate(value_sources))
 
     def sort_fdb_request_ranges(self, current_start_idx, lat_length, fdb_node_ranges):
-        (
-            new_fdb_node_ranges,
-            new_current_start_idx,
-        ) = self.remove_duplicates_in_request_ranges(fdb_node_ranges, current_start_idx)
-        current_start_idx = new_current_start_idx
-        fdb_node_ranges = new_fdb_node_ranges
-        interm_request_ranges = []
-        # TODO: modify the start indexes to have as many arrays as the request ranges
-        new_fdb_node_ranges = []
-        for i in range(lat_length):
-            interm_fdb_nodes = fdb_node_ranges[i]
-            old_interm_start_idx = current_start_idx[i]
-            for j in range(len(old_interm_start_idx)):
-                # TODO: if we sorted the cyclic values in increasing order on the tree too,
-                # then we wouldn't have to sort here?
-                sorted_list = sorted(enumerate(old_interm_start_idx[j]), key=lambda x: x[1])
-                original_indices_idx, interm_start_idx = zip(*sorted_list)
-                for interm_fdb_nodes_obj in interm_fdb_nodes[j]:
-                    interm_fdb_nodes_obj.values = tuple([interm_fdb_nodes_obj.values[k] for k in original_indices_idx])
-                if abs(interm_start_idx[-1] + 1 - interm_start_idx[0]) <= len(interm_start_idx):
-                    current_request_ranges = (
-                        interm_start_idx[0],
-                        interm_start_idx[-1] + 1,
-                    )
-                    interm_request_ranges.append(current_request_ranges)
-                    new_fdb_node_ranges.append(interm_fdb_nodes[j])
-                else:
-                    jumps = list(map(operator.sub, interm_start_idx[1:], interm_start_idx[:-1]))
-                    last_idx = 0
-                    for k, jump in enumerate(jumps):
-                        if jump > 1:
-                            current_request_ranges = (
-                                interm_start_idx[last_idx],
-                                interm_start_idx[k] + 1,
-                            )
-                            new_fdb_node_ranges.append(interm_fdb_nodes[j])
-                            last_idx = k + 1
-                            interm_request_ranges.append(current_request_ranges)
-                        if k == len(interm_start_idx) - 2:
-                            current_request_ranges = (
-                                interm_start_idx[last_idx],
-                                interm_start_idx[-1] + 1,
-                            )
-                            interm_request_ranges.append(current_request_ranges)
-                            new_fdb_node_ranges.append(interm_fdb_nodes[j])
-        request_ranges_with_idx = list(enumerate(interm_request_ranges))
-        sorted_list = sorted(request_ranges_with_idx, key=lambda x: x[1][0])
-        original_indices, sorted_request_ranges = zip(*sorted_list)
-        return (original_indices, sorted_request_ranges, new_fdb_node_ranges)
+        # The indices of all the nodes are put in a single array, along with the position of their node in
+        # fdb_range_nodes, so that the request ranges can be found without looping over the nodes
+        fdb_range_nodes = [fdb_node_ranges[i][j] for i in range(lat_length) for j in range(len(current_start_idx[i]))]
+        node_start_idxs = [idxs for i in range(lat_length) for idxs in current_start_idx[i]]
+        node_lengths = np.fromiter(map(len, node_start_idxs), dtype=np.int64, count=len(node_start_idxs))
+        start_idxs = np.fromiter(chain.from_iterable(node_start_idxs), dtype=np.int64, count=node_lengths.sum())
+        node_ids = np.repeat(np.arange(len(fdb_range_nodes)), node_lengths)
+
+        start_idxs, node_ids = self.remove_duplicates_in_request_ranges(fdb_range_nodes, start_idxs, node_ids)
+
+        # TODO: if we sorted the cyclic values in increasing order on the tree too,
+        # then we wouldn't have to sort here?
+        is_same_node = node_ids[1:] == node_ids[:-1]
+        is_unsorted = is_same_node & (start_idxs[1:] < start_idxs[:-1])
+        if is_unsorted.any():
+            sorting_order = np.lexsort((start_idxs, node_ids))
+            node_offsets = np.searchsorted(node_ids, np.arange(len(fdb_range_nodes)))
+            for node_id in np.unique(node_ids[1:][is_unsorted]).tolist():
+                node_offset = node_offsets[node_id]
+                interm_fdb_nodes_obj = fdb_range_nodes[node_id][0]
+                node_values = interm_fdb_nodes_obj.values
+                original_indices_idx = sorting_order[node_offset : node_offset + len(node_values)] - node_offset
+                interm_fdb_nodes_obj.values = tuple(node_values[k] for k in original_indices_idx)
+            start_idxs = start_idxs[sorting_order]
+
+        # The indices are unique, so a new range starts at each jump and at each new node
+        is_range_start = np.ones(len(start_idxs), dtype=bool)
+        is_range_start[1:] = ~is_same_node | (start_idxs[1:] - start_idxs[:-1] > 1)
+        range_firsts = np.nonzero(is_range_start)[0]
+        range_lasts = np.append(range_firsts[1:] - 1, len(start_idxs) - 1)
+        range_starts = start_idxs[range_firsts]
+        range_ends = start_idxs[range_lasts] + 1
+        new_fdb_node_ranges = [fdb_range_nodes[node_id] for node_id in node_ids[range_firsts].tolist()]
+
+        original_indices = np.argsort(range_starts, kind="stable")
+        sorted_request_ranges = tuple(
+            zip(range_starts[original_indices].tolist(), range_ends[original_indices].tolist())
+        )
+        return (tuple(original_indices.tolist()), sorted_request_ranges, new_fdb_node_ranges)
 
     def datacube_natural_indexes(self, axis, subarray):
         indexes = subarray.get(axis.name, None)
@@ -0,0 +1,101 @@
+import math
+import time
+
+import numpy as np
+
+
+class LocalExtractResult:
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = values
+
+
+class LocalGribJump:
+    """In-process stand-in for pygribjump.GribJump, serving fields from a NumPy array.
+
+    The archive holds one field per combination of the values of the axes, in row-major order over the axes in the
+    order in which they are given, and each field has grid_size values. The fields are read from data, an array of
+    shape (number of fields, grid_size) which can be memory-mapped (see open_memmap). Without data, the fields are
+    synthetic and the value at grid index i of the field number f is f * grid_size + i, so that the fields of large
+    grids take no memory.
+    Each extract call waits for latency seconds, and then for field_latency seconds per field, to emulate a remote
+    GribJump server. Fields which are not in the archive, or which match one of the partial requests in
+    missing_fields, are returned without values, like GribJump does.
+
+    Datacube.create recognises this class, so it can be passed as datacube to Polytope to run the FDB datacube offline.
+    """
+
+    def __init__(
+        self, axes, grid_size, data=None, grid_md5_hash=None, latency=0.0, field_latency=0.0, missing_fields=()
+    ):
+        self._axes = {name: [str(value) for value in values] for name, values in axes.items()}
+        self._axis_lookups = {name: {value: i for i, value in enumerate(values)} for name, values in self._axes.items()}
+        self._shape = tuple(len(values) for values in self._axes.values())
+        self.grid_size = grid_size
+        if data is not None and tuple(data.shape) != (math.prod(self._shape), grid_size):
+            raise ValueError(f"Expected fields of shape {(math.prod(self._shape), grid_size)}, got {data.shape}")
+        self.data = data
+        self.grid_md5_hash = grid_md5_hash
+        self.latency = latency
+        self.field_latency = field_latency
+        self.missing_fields = [{name: str(value) for name, value in field.items()} for field in missing_fields]
+        self.num_extract_calls = 0
+        self.num_extracted_fields = 0
+
+    @classmethod
+    def open_memmap(cls, path, axes, grid_size, dtype="<f8", **kwargs):
+        """Serve the fields stored in the raw binary file at path, without reading them into memory."""
+        num_fields = math.prod(len(values) for values in axes.values())
+        data = np.memmap(path, dtype=dtype, mode="r", shape=(num_fields, grid_size))
+        return cls(axes, grid_size, data=data, **kwargs)
+
+    def axes(self, request, ctx=None):
+        # Return the values of each axis in the fields matching the request
+        found_axes = {}
+        for name, values in self._axes.items():
+            if name not in request:
+                found_axes[name] = list(values)
+                continue
+            requested = request[name] if isinstance(request[name], (list, tuple)) else [request[name]]
+            found_values = [str(value) for value in requested if str(value) in self._axis_lookups[name]]
+            if len(found_values) == 0:
+                return {}
+            found_axes[name] = found_values
+        return found_axes
+
+    def field_index(self, request):
+        """Return the position in the archive of the field of the request, or None if it is not archived."""
+        for field in self.missing_fields:
+            if all(str(request.get(name, None)) == value for name, value in field.items()):
+                return None
+        field_idxs = []
+        for name, lookup in self._axis_lookups.items():
+            idx = lookup.get(str(request.get(name, None)), None)
+            if idx is None:
+                return None
+            field_idxs.append(idx)
+        return int(np.ravel_multi_index(field_idxs, self._shape)) if field_idxs else 0
+
+    def extract(self, requests, ctx=None):
+        self.num_extract_calls += 1
+        self.num_extracted_fields += len(requests)
+        if self.latency or self.field_latency:
+            time.sleep(self.latency + self.field_latency * len(requests))
+        results = []
+        for request, ranges, md5_hash in requests:
+            if self.grid_md5_hash is not None and md5_hash is not None and md5_hash != self.grid_md5_hash:
+                raise ValueError("BadValue: Grid hash mismatch")
+            field_idx = self.field_index(request)
+            if field_idx is None:
+                results.append(LocalExtractResult([]))
+                continue
+            results.append(LocalExtractResult([self._field_values(field_idx, start, end) for start, end in ranges]))
+        return iter(results)
+
+    def _field_values(self, field_idx, start, end):
+        if start < 0 or end > self.grid_size or start > end:
+            raise ValueError(f"Range ({start}, {end}) is outside of the grid of size {self.grid_size}")
+        if self.data is None:
+            return np.arange(start, end, dtype=np.float64) + field_idx * self.grid_size
+        return np.asarray(self.data[field_idx, start:end], dtype=np.float64)
@@ -30,12 +30,12 @@ class MockDatacube(Datacube):
 
         if context is None:
             context = {}
-        for r in requests.leaves:
-            path = r.flatten()
-            if len(path.items()) == len(self.dimensions.items()):
+        # NOTE: collect the leaves first since we might remove branches from the tree
+        for r, path in list(requests.iter_leaves()):
+            if len(path) == len(self.dimensions.items()):
                 result = (0,)
-                for k, v in path.items():
-                    result += v * self.stride[k]
+                for node in path:
+                    result += node.values * self.stride[node.axis.name]
 
                 r.result = result
             else:
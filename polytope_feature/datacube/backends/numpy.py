@@ -0,0 +1,177 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .datacube import Datacube
+
+
+class NumpyArray:
+    """NumPy array labelled by a 1D coordinate array per dimension.
+
+    The coordinates are given in the order of the dimensions of values, which can be an ndarray or a np.memmap. Only
+    the selected values of a memory-mapped array are read.
+    Datacube.create recognises this class, so it can be passed as datacube to Polytope.
+    """
+
+    def __init__(self, values, coords, name=None):
+        self.coords = {dim: np.asarray(coord) for dim, coord in coords.items()}
+        shape = tuple(len(coord) for coord in self.coords.values())
+        if any(coord.ndim != 1 for coord in self.coords.values()) or tuple(values.shape) != shape:
+            raise ValueError(f"Expected coordinates of the dimensions of values of shape {values.shape}, got {shape}")
+        self.values = values
+        self.name = name
+
+    @property
+    def dims(self):
+        return tuple(self.coords)
+
+
+class NumpyDatacube(Datacube):
+    """NumPy arrays are labelled by a coordinate array per dimension, axes are defined by the dimension names."""
+
+    def __init__(
+        self,
+        array: NumpyArray,
+        axis_options=None,
+        compressed_axes_options=[],
+        context=None,
+    ):
+        super().__init__(
+            axis_options,
+            compressed_axes_options,
+        )
+
+        if axis_options is None:
+            axis_options = {}
+        self.axis_options = axis_options
+        self.axis_counter = 0
+        self._axes = None
+        self.array = array
+        self.indexes = {dim: pd.Index(coord) for dim, coord in array.coords.items()}
+        # The indexes of the dimensions do not depend on the path, only the transformed axes look them up
+        self.path_independent_indexes.update(self.indexes)
+        # the string coordinates are always matched exactly
+        self._exact_dims = {dim for dim, coord in array.coords.items() if coord.dtype.type in (np.str_, np.object_)}
+
+        for name, values in array.coords.items():
+            options = None
+            for opt in self.axis_options:
+                if opt.axis_name == name:
+                    options = opt
+            self._check_and_add_axes(options, name, values)
+            self.treated_axes.append(name)
+            self.complete_axes.append(name)
+        # add other options to axis which were just created above like "lat" for the mapper transformations for eg
+        for name in self._axes:
+            if name not in self.treated_axes:
+                options = None
+                for opt in self.axis_options:
+                    if opt.axis_name == name:
+                        options = opt
+                val = self._axes[name].type
+                self._check_and_add_axes(options, name, val)
+
+    def find_point_cloud(self):
+        # find the point cloud of irregular grid if it exists
+        if self.grid_transformation.is_irregular:
+            return self.grid_transformation.grid_latlon_points()
+
+    def get(self, requests, context=None, leaf_path=None, axis_counter=0):
+        leaves = []
+        self.find_leaves(requests, leaves, leaf_path, axis_counter)
+        if len(leaves) == 0:
+            return
+        dims = self.array.dims
+
+        # Look up the labels of all the leaves along each dimension at once
+        labels = {dim: [] for dim in dims}
+        for _, leaf_path in leaves:
+            for dim, value in leaf_path.items():
+                labels[dim].extend(value if isinstance(value, (list, tuple)) else [value])
+        positions = {dim: self.find_positions(dim, dim_labels) for dim, dim_labels in labels.items() if dim_labels}
+
+        # Build the points of the orthogonal selection of each leaf and read them all at once
+        offsets = {dim: 0 for dim in dims}
+        points = {dim: [] for dim in dims}
+        shapes = []
+        leaf_dims = []
+        for _, leaf_path in leaves:
+            leaf_idxs = []
+            shape = []
+            result_dims = []
+            for dim, size in zip(dims, self.array.values.shape):
+                if dim not in leaf_path:
+                    # the dimension is not in the path and is selected whole
+                    leaf_idxs.append(np.arange(size))
+                    shape.append(size)
+                    result_dims.append(dim)
+                    continue
+                value = leaf_path[dim]
+                num_labels = len(value) if isinstance(value, (list, tuple)) else 1
+                leaf_idxs.append(positions[dim][offsets[dim] : offsets[dim] + num_labels])
+                offsets[dim] += num_labels
+                # NOTE: a scalar label drops the dimension, like in xarray
+                if isinstance(value, (list, tuple)):
+                    shape.append(num_labels)
+                    result_dims.append(dim)
+            for dim, dim_idxs in zip(dims, np.ix_(*leaf_idxs)):
+                points[dim].append(np.broadcast_to(dim_idxs, [len(idxs) for idxs in leaf_idxs]).ravel())
+            shapes.append(tuple(shape))
+            leaf_dims.append(tuple(result_dims))
+        values = self.array.values[tuple(np.concatenate(points[dim]) for dim in dims)]
+
+        # Scatter the values back to the leaves
+        start = 0
+        for (leaf, _), shape, result_dims in zip(leaves, shapes, leaf_dims):
+            size = math.prod(shape)
+            leaf.result = (self.array.name, values[start : start + size].reshape(shape))
+            leaf.result_dims = result_dims
+            start += size
+
+    def find_leaves(self, requests, leaves, leaf_path=None, axis_counter=0):
+        # Collect the leaves of the tree with the paths to their values in the array
+        if leaf_path is None:
+            leaf_path = {}
+        if requests.axis.name == "root":
+            for c in requests.children:
+                self.find_leaves(c, leaves, leaf_path, axis_counter + 1)
+        else:
+            key_value_path = {requests.axis.name: requests.values}
+            ax = requests.axis
+            key_value_path, leaf_path, self.unwanted_path = ax.unmap_path_key(
+                key_value_path, leaf_path, self.unwanted_path
+            )
+            leaf_path.update(key_value_path)
+            if len(requests.children) != 0:
+                # We are not a leaf and we loop over
+                for c in requests.children:
+                    self.find_leaves(c, leaves, leaf_path, axis_counter + 1)
+            else:
+                if self.axis_counter != axis_counter:
+                    requests.remove_branch()
+                else:
+                    leaves.append((requests, {key: leaf_path[key] for key in self.array.dims if key in leaf_path}))
+
+    def find_positions(self, dim, labels):
+        # The labels are matched exactly, unless a shape of the request looks for the nearest points on the dimension
+        # NOTE: pandas looks up the nearest labels with a binary search in the sorted index, and the exact labels in a
+        # hash table
+        index = self.indexes[dim]
+        nearest_dims = {name for axes in self.nearest_search for name in axes}
+        if dim in nearest_dims and dim not in self._exact_dims:
+            positions = index.get_indexer(labels, method="nearest")
+        else:
+            positions = index.get_indexer(labels)
+        if (positions < 0).any():
+            raise KeyError(f"not all values found in index '{dim}'")
+        return positions
+
+    def datacube_natural_indexes(self, axis, subarray):
+        return subarray.get(axis.name, None)
+
+    def select(self, path, unmapped_path):
+        return self.indexes
+
+    def ax_vals(self, name):
+        return self.array.coords.get(name, None)
@@ -1,7 +1,11 @@
+import math
 from copy import copy, deepcopy
+from itertools import chain
+from operator import getitem
 
 import numpy as np
 import xarray as xr
+from xarray.indexes import PandasIndex
 
 from .datacube import Datacube
 
@@ -15,6 +19,7 @@ class XArrayDatacube(Datacube):
         axis_options=None,
         compressed_axes_options=[],
         context=None,
+        bulk_selection=True,
     ):
         super().__init__(
             axis_options,
@@ -27,6 +32,15 @@ class XArrayDatacube(Datacube):
         self.axis_counter = 0
         self._axes = None
         self.dataarray = dataarray
+        # select the values of all the leaves of a request at once, instead of one sel per leaf
+        self.bulk_selection = bulk_selection
+        self._dims = set(dataarray.dims)
+        self._coord_dtypes = dict(dataarray.coords.dtypes)
+        self._str_coords = [name for name, dtype in self._coord_dtypes.items() if dtype.type is np.str_]
+        # The index of a dimension coordinate is the same whatever the path to it, so we look it up only once
+        for name, index in dataarray.xindexes.items():
+            if name in self._dims and type(index) is PandasIndex:
+                self.path_independent_indexes[name] = index.to_pandas_index()
 
         for name, values in dataarray.coords.variables.items():
             options = None
@@ -63,14 +77,27 @@ class XArrayDatacube(Datacube):
     def find_point_cloud(self):
         # find the point cloud of irregular grid if it exists
         if self.grid_transformation.is_irregular:
-            return self.grid_transformation._final_transformation.grid_latlon_points()
+            return self.grid_transformation.grid_latlon_points()
 
     def get(self, requests, context=None, leaf_path=None, axis_counter=0):
+        leaves = []
+        self.find_leaves(requests, leaves, leaf_path, axis_counter)
+        if self.bulk_selection and self.can_select_in_bulk(leaves):
+            self.select_leaves_in_bulk(leaves)
+        else:
+            for leaf, leaf_path_copy, unmapped_path in leaves:
+                subxarray = self.dataarray.sel(leaf_path_copy, method="nearest")
+                subxarray = subxarray.sel(unmapped_path)
+                leaf.result = (subxarray.name, subxarray.values)
+                leaf.result_dims = subxarray.dims
+
+    def find_leaves(self, requests, leaves, leaf_path=None, axis_counter=0):
+        # Collect the leaves of the tree with the paths to select their values in the dataarray
         if leaf_path is None:
             leaf_path = {}
         if requests.axis.name == "root":
             for c in requests.children:
-                self.get(c, context, leaf_path, axis_counter + 1)
+                self.find_leaves(c, leaves, leaf_path, axis_counter + 1)
         else:
             key_value_path = {requests.axis.name: requests.values}
             ax = requests.axis
@@ -83,13 +110,14 @@ class XArrayDatacube(Datacube):
                 for c in requests.children:
                     if axis_counter == self.axis_counter - 1:
                         leaf_path["index"] = c.indexes
-                    self.get(c, context, leaf_path, axis_counter + 1)
+                    self.find_leaves(c, leaves, leaf_path, axis_counter + 1)
             else:
                 if self.axis_counter != axis_counter:
                     requests.remove_branch()
                 else:
-                    # We are at a leaf and need to assign value to it
-                    leaf_path_copy = deepcopy(leaf_path)
+                    # NOTE: the values of the path are replaced, not modified, while walking the tree so a shallow
+                    # copy is enough
+                    leaf_path_copy = dict(leaf_path)
                     unmapped_path = {}
                     self.refit_path(leaf_path_copy, unmapped_path, leaf_path)
                     for key in leaf_path_copy:
@@ -98,11 +126,124 @@ class XArrayDatacube(Datacube):
                     for key in unmapped_path:
                         if isinstance(unmapped_path[key], tuple):
                             unmapped_path[key] = list(unmapped_path[key])
-                    subxarray = self.dataarray.sel(leaf_path_copy, method="nearest")
-                    subxarray = subxarray.sel(unmapped_path)
-                    value = subxarray.values
-                    key = subxarray.name
-                    requests.result = (key, value)
+                    leaves.append((requests, leaf_path_copy, unmapped_path))
+
+    def can_select_in_bulk(self, leaves):
+        # The bulk selection reproduces the label lookups of sel for the dimensions with a plain pandas index, or
+        # without an index, which are selected by position
+        if len(self.dataarray.dims) == 0:
+            return False
+        for _, leaf_path_copy, unmapped_path in leaves:
+            for key in chain(leaf_path_copy, unmapped_path):
+                if key not in self.dataarray.dims:
+                    return False
+                index = self.dataarray.xindexes.get(key, None)
+                if index is not None and type(index) is not PandasIndex:
+                    return False
+                if index is None and key in leaf_path_copy:
+                    return False
+        return True
+
+    def select_leaves_in_bulk(self, leaves):
+        if len(leaves) == 0:
+            return
+        # Look up the labels of all the leaves along each dimension at once
+        dims = self.dataarray.dims
+        labels = {dim: [] for dim in dims}
+        methods = {}
+        for _, leaf_path_copy, unmapped_path in leaves:
+            for path, method in ((leaf_path_copy, "nearest"), (unmapped_path, None)):
+                for key, value in path.items():
+                    labels[key].extend(value if isinstance(value, list) else [value])
+                    methods[key] = method
+        positions = {}
+        for dim, method in methods.items():
+            index = self.dataarray.xindexes.get(dim, None)
+            if index is None:
+                positions[dim] = np.asarray(labels[dim], dtype=np.intp)
+            else:
+                positions[dim] = np.asarray(index.sel({dim: labels[dim]}, method=method).dim_indexers[dim])
+
+        # Build the points of the orthogonal selection of each leaf, in the order of the dimensions of the dataarray
+        offsets = {dim: 0 for dim in dims}
+        points = {dim: [] for dim in dims}
+        shapes = []
+        leaf_dims = []
+        for _, leaf_path_copy, unmapped_path in leaves:
+            leaf_idxs = []
+            shape = []
+            result_dims = []
+            for dim in dims:
+                if dim in leaf_path_copy:
+                    value = leaf_path_copy[dim]
+                elif dim in unmapped_path:
+                    value = unmapped_path[dim]
+                else:
+                    # the dimension is not in the path and is selected whole
+                    leaf_idxs.append(np.arange(self.dataarray.sizes[dim]))
+                    shape.append(self.dataarray.sizes[dim])
+                    result_dims.append(dim)
+                    continue
+                num_labels = len(value) if isinstance(value, list) else 1
+                dim_idxs = positions[dim][offsets[dim] : offsets[dim] + num_labels]
+                offsets[dim] += num_labels
+                if isinstance(value, list):
+                    shape.append(num_labels)
+                    result_dims.append(dim)
+                # NOTE: a scalar label drops the dimension, like in sel
+                leaf_idxs.append(dim_idxs)
+            for dim, dim_idxs in zip(dims, np.ix_(*leaf_idxs)):
+                points[dim].append(np.broadcast_to(dim_idxs, [len(idxs) for idxs in leaf_idxs]).ravel())
+            shapes.append(tuple(shape))
+            leaf_dims.append(tuple(result_dims))
+
+        # Read all the points at once and scatter the values back to the leaves
+        values = self.read_points({dim: np.concatenate(points[dim]) for dim in dims})
+        key = self.dataarray.name
+        start = 0
+        for (leaf, _, _), shape, result_dims in zip(leaves, shapes, leaf_dims):
+            size = math.prod(shape)
+            leaf.result = (key, values[start : start + size].reshape(shape))
+            leaf.result_dims = result_dims
+            start += size
+
+    def read_points(self, points):
+        # Read the values of the dataarray at the given positions along each of its dimensions
+        if self.dataarray.chunks is not None:
+            return self.read_chunked_points(points)
+        indexers = {dim: xr.Variable("points", idxs) for dim, idxs in points.items()}
+        return self.dataarray.isel(indexers).values
+
+    def read_chunked_points(self, points):
+        # For dask arrays, group the points by the chunk they fall in and select them from each chunk, so that every
+        # chunk is loaded once, and compute the selections of all the chunks together with the dask scheduler
+        import dask
+
+        data = self.dataarray.data
+        chunk_idxs = []
+        local_idxs = []
+        for dim, dim_chunks in zip(self.dataarray.dims, data.chunks):
+            chunk_starts = np.cumsum((0,) + tuple(dim_chunks))
+            dim_chunk_idxs = np.searchsorted(chunk_starts, points[dim], side="right") - 1
+            chunk_idxs.append(dim_chunk_idxs)
+            local_idxs.append(points[dim] - chunk_starts[dim_chunk_idxs])
+        values = np.empty(len(chunk_idxs[0]), dtype=data.dtype)
+        if len(values) == 0:
+            return values
+
+        chunk_keys = np.ravel_multi_index(chunk_idxs, data.numblocks)
+        order = np.argsort(chunk_keys, kind="stable")
+        groups = np.split(order, np.flatnonzero(np.diff(chunk_keys[order])) + 1)
+        # NOTE: each selection is a single task on the delayed chunk, which keeps the graph small
+        blocks = data.to_delayed(optimize_graph=False)
+        selections = []
+        for group in groups:
+            block = blocks[tuple(int(dim_chunk_idxs[group[0]]) for dim_chunk_idxs in chunk_idxs)]
+            selection = tuple(dim_local_idxs[group] for dim_local_idxs in local_idxs)
+            selections.append(dask.delayed(getitem, traverse=False)(block, selection))
+        for group, group_values in zip(groups, dask.compute(*selections)):
+            values[group] = group_values
+        return values
 
     def datacube_natural_indexes(self, axis, subarray):
         if axis.name in self.complete_axes:
@@ -122,16 +263,15 @@ class XArrayDatacube(Datacube):
 
     def refit_path(self, path_copy, unmapped_path, path):
         for key in path.keys():
-            if key not in self.dataarray.dims:
+            if key not in self._dims:
                 path_copy.pop(key)
-            elif key not in self.dataarray.coords.dtypes:
+            elif key not in self._coord_dtypes:
+                unmapped_path.update({key: path[key]})
+                path_copy.pop(key, None)
+        for key in self._str_coords:
+            if key in path.keys():
                 unmapped_path.update({key: path[key]})
                 path_copy.pop(key, None)
-            for key in self.dataarray.coords.dtypes:
-                key_dtype = self.dataarray.coords.dtypes[key]
-                if key_dtype.type is np.str_ and key in path.keys():
-                    unmapped_path.update({key: path[key]})
-                    path_copy.pop(key, None)
 
     def select(self, path, unmapped_path):
         path_copy = copy(path)
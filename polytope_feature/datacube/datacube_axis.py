@@ -64,9 +64,11 @@ class DatacubeAxis(ABC):
         return (path, unmapped_path)
 
     def find_standard_indexes(self, path, datacube):
+        indexes = datacube.path_independent_indexes.get(self.name, None)
+        if indexes is not None:
+            return indexes
         unmapped_path = {}
-        path_copy = deepcopy(path)
-        for key in path_copy:
+        for key in list(path):
             axis = datacube._axes[key]
             path, unmapped_path = axis.unmap_to_datacube(path, unmapped_path)
         subarray = datacube.select(path, unmapped_path)
@@ -0,0 +1,89 @@
+import json
+import threading
+from collections import OrderedDict
+
+
+class GridRegistry:
+    """Process-wide store for the immutable geometry of a grid.
+
+    Building a grid mapper (first axis tables, index maps), its point cloud or a spatial index over that point cloud
+    is expensive and the result only depends on the grid definition. Every datacube and engine of the process looks
+    these objects up here by (kind, grid key), so each one is built once per process instead of once per request.
+    The stored objects are shared between datacubes and must therefore never be modified after construction.
+    At most max_entries objects are kept, the least recently used ones being dropped first, so that a long-running
+    process does not keep every grid it has seen.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+
+    def get_or_create(self, kind, key, factory):
+        # NOTE: if the key is None, the grid could not be identified so we do not share anything
+        if key is None:
+            return factory()
+        with self._lock:
+            entry = self._entries.get((kind, key), None)
+            if entry is None:
+                entry = factory()
+                self._entries[(kind, key)] = entry
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end((kind, key))
+            return entry
+
+    def get(self, kind, key):
+        with self._lock:
+            entry = self._entries.get((kind, key), None)
+            if entry is not None:
+                self._entries.move_to_end((kind, key))
+            return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, kind_key):
+        with self._lock:
+            return kind_key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+grid_registry = GridRegistry()
+
+
+class _PointsIdentity:
+    # Key of a point cloud given without an identifier, which only matches the same point cloud object. It keeps a
+    # reference to the points so that their id is not reused while the key is in use.
+    __slots__ = ("points",)
+
+    def __init__(self, points):
+        self.points = points
+
+    def __hash__(self):
+        return id(self.points)
+
+    def __eq__(self, other):
+        return isinstance(other, _PointsIdentity) and other.points is self.points
+
+
+def grid_key(base_axis, mapper_options):
+    """Return a hashable key identifying the grid described by mapper_options on base_axis.
+
+    The point cloud of unstructured grids is too large to be hashed for every mapper, so these grids are identified by
+    their md5_hash or uuid options. Without either, only mappers built on the same point cloud object share a key.
+    """
+    if hasattr(mapper_options, "model_dump"):
+        options = mapper_options.model_dump(exclude={"points"})
+    else:
+        options = {k: v for k, v in vars(mapper_options).items() if k != "points"}
+    points = getattr(mapper_options, "points", None)
+    points_key = None
+    if points is not None and options.get("md5_hash", None) is None and options.get("uuid", None) is None:
+        points_key = _PointsIdentity(points)
+    return (base_axis, json.dumps(options, sort_keys=True, default=str), points_key)
@@ -15,7 +15,7 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x10index_tree.proto\x12\nindex_tree"\x9a\x01\n\x04Node\x12\x0c\n\x04\x61xis\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x03(\t\x12\x0f\n\x07indexes\x18\x03 \x03(\x03\x12\x0e\n\x06result\x18\x04 \x03(\x01\x12\x13\n\x0bsize_result\x18\x05 \x03(\x03\x12"\n\x08\x63hildren\x18\x06 \x03(\x0b\x32\x10.index_tree.Node\x12\x1b\n\x13size_indexes_branch\x18\x07 \x03(\x03\x62\x06proto3'
+    b'\n\x10index_tree.proto\x12\nindex_tree"\xc9\x01\n\x04Node\x12\x0c\n\x04axis\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x03(\t\x12\x0f\n\x07indexes\x18\x03 \x03(\x03\x12\x0e\n\x06result\x18\x04 \x03(\x01\x12\x13\n\x0bsize_result\x18\x05 \x03(\x03\x12"\n\x08children\x18\x06 \x03(\x0b2\x10.index_tree.Node\x12\x1b\n\x13size_indexes_branch\x18\x07 \x03(\x03\x12\x16\n\x0epacked_indexes\x18\x08 \x01(\x0c\x12\x15\n\rpacked_result\x18\t \x01(\x0cb\x06proto3'
 )
 
 _globals = globals()
@@ -24,5 +24,5 @@ _builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, "index_tree_pb2", _globals)
 if not _descriptor._USE_C_DESCRIPTORS:
     DESCRIPTOR._loaded_options = None
     _globals["_NODE"]._serialized_start = 33
-    _globals["_NODE"]._serialized_end = 187
+    _globals["_NODE"]._serialized_end = 234
 # @@protoc_insertion_point(module_scope)
@@ -2,6 +2,7 @@ import json
 import math
 import os
 import tempfile
+import threading
 
 import eccodes
 
@@ -117,61 +118,85 @@ def get_gridspec_and_hash(gid):
 
 # TODO: extract the right info and then write it to file, one for the grid hash and one for the actual config
 
+# Cache file stored alongside this module
+GRID_CACHE_FILE = os.path.join(os.path.dirname(__file__), "grid_cache.json")
 
-def lookup_grid_config(req):
-    gid = get_first_grib_message(req)
-    req_georef = req["georef"]
+# The grid configs are cached in two levels, keyed by georef: first in this process, and then in GRID_CACHE_FILE,
+# which is shared between processes. A GRIB message is only fetched from the FDB when both miss.
+_grid_cache = {}
+_grid_cache_lock = threading.Lock()
+_grid_cache_key_locks = {}
 
-    # Cache file stored alongside this module
-    GRID_CACHE_FILE = os.path.join(os.path.dirname(__file__), "grid_cache.json")
 
-    def _load_cache():
-        try:
-            with open(GRID_CACHE_FILE, "r", encoding="utf-8") as fh:
-                return json.load(fh)
-        except FileNotFoundError:
-            return {}
-        except Exception:
-            return {}
-
-    def _save_cache(cache):
-        dirpath = os.path.dirname(GRID_CACHE_FILE)
-        os.makedirs(dirpath, exist_ok=True)
-        fd, tmp = tempfile.mkstemp(dir=dirpath, prefix=".grid_cache.")
-        try:
-            with os.fdopen(fd, "w", encoding="utf-8") as fh:
-                json.dump(cache, fh, indent=2, sort_keys=True)
-            os.replace(tmp, GRID_CACHE_FILE)
-        finally:
-            if os.path.exists(tmp):
-                try:
-                    os.remove(tmp)
-                except Exception:
-                    pass
-
-    # Use a stable serialization of the georef as the cache key
+def _load_cache():
     try:
-        cache_key = json.dumps(req_georef, sort_keys=True, default=str)
+        with open(GRID_CACHE_FILE, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
     except Exception:
-        cache_key = str(req_georef)
+        return {}
 
-    cache = _load_cache()
 
+def _save_cache(cache):
+    dirpath = os.path.dirname(GRID_CACHE_FILE)
+    os.makedirs(dirpath, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=dirpath, prefix=".grid_cache.")
     try:
-        if cache_key in cache:
-            entry = cache[cache_key]
-            return (entry.get("gridspec"), entry.get("md5hash"))
-
-        gridspec, md5hash = get_gridspec_and_hash(gid)
-        cache[cache_key] = {"gridspec": gridspec, "md5hash": md5hash}
-        try:
-            _save_cache(cache)
-        except Exception:
-            # Swallow cache write errors but continue to return computed value
-            pass
-        return (gridspec, md5hash)
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(cache, fh, indent=2, sort_keys=True)
+        os.replace(tmp, GRID_CACHE_FILE)
     finally:
-        eccodes.codes_release(gid)
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except Exception:
+                pass
+
+
+def grid_cache_key(georef):
+    # Use a stable serialization of the georef as the cache key
+    try:
+        return json.dumps(georef, sort_keys=True, default=str)
+    except Exception:
+        return str(georef)
+
+
+def lookup_grid_config(req):
+    cache_key = grid_cache_key(req["georef"])
+
+    entry = _grid_cache.get(cache_key, None)
+    if entry is not None:
+        return (entry.get("gridspec"), entry.get("md5hash"))
+
+    with _grid_cache_lock:
+        key_lock = _grid_cache_key_locks.setdefault(cache_key, threading.Lock())
+    # NOTE: concurrent lookups of the same georef wait for each other, so that only one of them reads the FDB
+    with key_lock:
+        entry = _grid_cache.get(cache_key, None)
+        if entry is None:
+            cache = _load_cache()
+            entry = cache.get(cache_key, None)
+            if entry is None:
+                gid = get_first_grib_message(req)
+                try:
+                    gridspec, md5hash = get_gridspec_and_hash(gid)
+                finally:
+                    eccodes.codes_release(gid)
+                entry = {"gridspec": gridspec, "md5hash": md5hash}
+                # Other processes may have added to the file in the meantime
+                cache = _load_cache()
+                cache[cache_key] = entry
+                try:
+                    _save_cache(cache)
+                except Exception:
+                    # Swallow cache write errors but continue to return computed value
+                    pass
+            with _grid_cache_lock:
+                for key, value in cache.items():
+                    _grid_cache.setdefault(key, value)
+                _grid_cache[cache_key] = entry
+        return (entry.get("gridspec"), entry.get("md5hash"))
 
 
 # def gridspec_to_grid_config(gridspec, md5hash):
@@ -21,36 +21,133 @@ class DatacubePath(OrderedDict):
 
 
 class TensorIndexTree(object):
+    # NOTE: requests can have millions of nodes, so the nodes are kept compact. Children containers, results and
+    # indexes are only created when they are first needed.
+    __slots__ = (
+        "_values",
+        "_path",
+        "_children",
+        "_parent",
+        "_result",
+        "result_dims",
+        "axis",
+        "_indexes",
+        "hidden",
+        "unsliced_polytopes",
+        "result_size",
+        "indexes_size",
+    )
+
     root = IntDatacubeAxis()
     root.name = "root"
 
     def __init__(self, axis=root, values=tuple()):
         # NOTE: the values here is a tuple so we can hash it
-        self.values = values
-        self.children = SortedList()
+        self._path = None
+        self._values = values
+        self._children = None
         self._parent = None
-        self.result = []
+        self._result = None
+        # names of the dimensions of an array result, when they are not laid out in the order of the path
+        self.result_dims = None
         self.axis = axis
-        self.ancestors = []
-        self.indexes = []
+        self._indexes = None
         self.hidden = False
 
     @property
-    def leaves(self):
-        leaves = []
-        self._collect_leaf_nodes(leaves)
-        return leaves
+    def values(self):
+        return self._values
 
-    def _collect_leaf_nodes(self, leaves):
-        if len(self.children) == 0:
-            leaves.append(self)
-            self.ancestors.append(self)
-        for n in self.children:
-            for ancestor in self.ancestors:
-                n.ancestors.append(ancestor)
-            if self.axis != TensorIndexTree.root:
-                n.ancestors.append(self)
-            n._collect_leaf_nodes(leaves)
+    @values.setter
+    def values(self, values):
+        self._values = values
+        self._invalidate_path()
+
+    @property
+    def path(self):
+        """The (axis name, values) pairs from the first node below the root down to this node, as a tuple.
+
+        The path is cached on the node and extends the cached path of its parent, so engines and datacubes can use
+        it for every index lookup without walking up the tree.
+        """
+        if self._path is None:
+            if self.axis.name == "root":
+                self._path = ()
+            else:
+                prefix = self._parent.path if self._parent is not None else ()
+                self._path = prefix + ((self.axis.name, self._values),)
+        return self._path
+
+    def _invalidate_path(self):
+        # NOTE: a node can only have a cached path if its parent has one, so we can stop at nodes without a path
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node._path is not None:
+                node._path = None
+                stack.extend(node.children)
+
+    @property
+    def children(self):
+        if self._children is None:
+            return _NO_CHILDREN
+        return self._children
+
+    @children.setter
+    def children(self, children):
+        self._children = children
+
+    def _own_children(self):
+        if self._children is None:
+            self._children = SortedList()
+        return self._children
+
+    @property
+    def result(self):
+        if self._result is None:
+            self._result = []
+        return self._result
+
+    @result.setter
+    def result(self, result):
+        self._result = result
+
+    @property
+    def indexes(self):
+        if self._indexes is None:
+            self._indexes = []
+        return self._indexes
+
+    @indexes.setter
+    def indexes(self, indexes):
+        self._indexes = indexes
+
+    @property
+    def leaves(self):
+        return list(self._iter_leaf_nodes())
+
+    def _iter_leaf_nodes(self):
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if len(node.children) == 0:
+                yield node
+            else:
+                stack.extend(reversed(node.children))
+
+    def iter_leaves(self):
+        """Yield (leaf, path) for every leaf below this node, in tree order.
+
+        The path is the tuple of nodes from the first node below the root down to the leaf, as in get_ancestors().
+        Paths are built incrementally while walking down the tree, so nothing is stored on the nodes.
+        """
+        stack = [(self, tuple(self.get_ancestors()))]
+        while stack:
+            node, path = stack.pop()
+            if len(node.children) == 0:
+                yield (node, path)
+            else:
+                stack.extend((child, path + (child,)) for child in reversed(node.children))
 
     def __setitem__(self, key, value):
         setattr(self, key, value)
@@ -99,8 +196,9 @@ class TensorIndexTree(object):
             return f"{self.axis}"
 
     def add_child(self, node):
-        self.children.add(node)
+        self._own_children().add(node)
         node._parent = self
+        node._invalidate_path()
 
     def add_value(self, value):
         new_values = list(self.values)
@@ -109,8 +207,11 @@ class TensorIndexTree(object):
         self.values = tuple(new_values)
 
     def create_child(self, axis, value, next_nodes):
+        return self.create_child_with_values(axis, (value,), next_nodes)
+
+    def create_child_with_values(self, axis, values, next_nodes):
         # TODO: what if we remove the next nodes here?
-        node = TensorIndexTree(axis, (value,))
+        node = TensorIndexTree(axis, tuple(values))
         # TODO: do we really need to find the child now in the compressed tree since we will have duplicates anyway?
         existing_child = self.find_child(node)
         if not existing_child:
@@ -127,7 +228,8 @@ class TensorIndexTree(object):
         if self.parent is not None:
             self.parent.children.remove(self)
         self._parent = node
-        self._parent.children.add(self)
+        self._parent._own_children().add(self)
+        self._invalidate_path()
 
     def get_root(self):
         node = self
@@ -139,19 +241,34 @@ class TensorIndexTree(object):
         return self.parent is None
 
     def find_child(self, node):
-        index = self.children.bisect_left(node)
+        if self._children is None:
+            return None
+        index = self._children.bisect_left(node)
         if index < len(self.children) and self.children[index] == node:
             return self.children[index]
         return None
 
+    def copy_children(self, other):
+        # Add a copy of the subtree below the other node below this node, without any results
+        stack = [(other, self)]
+        while stack:
+            source, target = stack.pop()
+            for child in source.children:
+                new_child = TensorIndexTree(child.axis, child.values)
+                new_child.hidden = child.hidden
+                if child._indexes is not None:
+                    new_child.indexes = list(child._indexes)
+                target.add_child(new_child)
+                stack.append((child, new_child))
+
     def add_node_layer_after(self, ax_name, vals):
         ax = IntDatacubeAxis()
         ax.name = ax_name
         interm_node = TensorIndexTree(ax, vals)
-        interm_node.children = self.children
+        interm_node.children = self._children
         interm_node._parent = self
-        self.children = SortedList()
-        self.children.add(interm_node)
+        self._children = SortedList()
+        self._children.add(interm_node)
         return interm_node
 
     def delete_non_index_nodes(self, index_vals):
@@ -224,11 +341,7 @@ class TensorIndexTree(object):
                     return
 
     def flatten(self):
-        path = DatacubePath()
-        ancestors = self.get_ancestors()
-        for ancestor in ancestors:
-            path[ancestor.axis.name] = ancestor.values
-        return path
+        return DatacubePath(self.path)
 
     def get_ancestors(self):
         ancestors = []
@@ -237,3 +350,6 @@ class TensorIndexTree(object):
             ancestors.append(current_node)
             current_node = current_node.parent
         return ancestors[::-1]
+
+
+_NO_CHILDREN = ()
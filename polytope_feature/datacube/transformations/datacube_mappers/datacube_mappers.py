@@ -1,6 +1,7 @@
 from copy import deepcopy
 from importlib import import_module
 
+from ...grid_registry import grid_key, grid_registry
 from ..datacube_transformations import DatacubeAxisTransformation
 
 
@@ -23,7 +24,11 @@ class DatacubeMapper(DatacubeAxisTransformation):
             self._axis_reversed = mapper_options.axis_reversed
         self.mapper_options = mapper_options
         self.old_axis = name
-        self._final_transformation = self.generate_final_transformation()
+        # the final transformation only depends on the grid, so it is shared by all mappers of the process
+        self.grid_key = grid_key(name, mapper_options)
+        self._final_transformation = grid_registry.get_or_create(
+            "mapper", self.grid_key, self.generate_final_transformation
+        )
         self._final_mapped_axes = self._final_transformation._mapped_axes
         self._axis_reversed = self._final_transformation._axis_reversed
         self.compressed_grid_axes = self._final_transformation.compressed_grid_axes
@@ -37,16 +42,14 @@ class DatacubeMapper(DatacubeAxisTransformation):
                 "polytope_feature.datacube.transformations.datacube_mappers.mapper_types." + "irregular"
             )
             constructor = getattr(module, map_type)
-            transformation = deepcopy(
-                constructor(
-                    self.old_axis,
-                    self.grid_axes,
-                    self.grid_resolution,
-                    self.md5_hash,
-                    self.local_area,
-                    self._axis_reversed,
-                    self.mapper_options,
-                )
+            transformation = constructor(
+                self.old_axis,
+                self.grid_axes,
+                self.grid_resolution,
+                self.md5_hash,
+                self.local_area,
+                self._axis_reversed,
+                self.mapper_options,
             )
             return transformation._final_irregular_transformation
         else:
@@ -54,19 +57,32 @@ class DatacubeMapper(DatacubeAxisTransformation):
                 "polytope_feature.datacube.transformations.datacube_mappers.mapper_types." + self.grid_type
             )
             constructor = getattr(module, map_type)
-            transformation = deepcopy(
-                constructor(
-                    self.old_axis,
-                    self.grid_axes,
-                    self.grid_resolution,
-                    self.md5_hash,
-                    self.local_area,
-                    self._axis_reversed,
-                    self.mapper_options,
-                )
+            transformation = constructor(
+                self.old_axis,
+                self.grid_axes,
+                self.grid_resolution,
+                self.md5_hash,
+                self.local_area,
+                self._axis_reversed,
+                self.mapper_options,
             )
             return transformation
 
+    def __deepcopy__(self, memo):
+        # The final transformation holds the grid tables, which live in the grid registry and are never modified.
+        # Share it between copies instead of duplicating it.
+        final_transformation = self.__dict__.get("_final_transformation", None)
+        if final_transformation is not None:
+            memo[id(final_transformation)] = final_transformation
+        new_mapper = self.__class__.__new__(self.__class__)
+        memo[id(self)] = new_mapper
+        for key, value in self.__dict__.items():
+            setattr(new_mapper, key, deepcopy(value, memo))
+        return new_mapper
+
+    def grid_latlon_points(self):
+        return grid_registry.get_or_create("point_cloud", self.grid_key, self._final_transformation.grid_latlon_points)
+
     def blocked_axes(self):
         return []
 
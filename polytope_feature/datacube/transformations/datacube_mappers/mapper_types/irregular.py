@@ -1,4 +1,3 @@
-from copy import deepcopy
 from importlib import import_module
 
 from ..datacube_mappers import DatacubeMapper
@@ -34,16 +33,14 @@ class IrregularGridMapper(DatacubeMapper):
             + self.grid_type
         )
         constructor = getattr(module, map_type)
-        transformation = deepcopy(
-            constructor(
-                self._base_axis,
-                self._mapped_axes,
-                self._resolution,
-                self.md5_hash,
-                self.local_area,
-                self._axis_reversed,
-                self.mapper_options,
-            )
+        transformation = constructor(
+            self._base_axis,
+            self._mapped_axes,
+            self._resolution,
+            self.md5_hash,
+            self.local_area,
+            self._axis_reversed,
+            self.mapper_options,
         )
         return transformation
 
@@ -1,24 +1,31 @@
 import math
-from copy import deepcopy
+import struct
+
+import numpy as np
 
 from . import index_tree_pb2 as pb2
 from .datacube_axis import IntDatacubeAxis
 from .tensor_index_tree import TensorIndexTree
 
+# NOTE: packed payloads are always little-endian, whichever machine encoded them
+PACKED_RESULT_DTYPE = np.dtype("<f8")
+PACKED_INDEXES_DTYPE = np.dtype("<i8")
+
 
-def encode_tree(tree: TensorIndexTree):
+def encode_tree(tree: TensorIndexTree, packed=False):
+    # If packed, the results and indexes are written as raw numeric bytes, which are much faster to encode and can be
+    # decoded straight into NumPy arrays
     node = pb2.Node()
 
     node.axis = tree.axis.name
 
     # NOTE: do we need this if we parse the tree before it has values?
     if tree.result is not None:
-        for result in tree.result:
-            node.result.append(result)
+        encode_result(node, tree.result, packed)
 
     # Nest children in protobuf root tree node
     for c in tree.children:
-        encode_child(tree, c, node)
+        encode_child(tree, c, node, packed=packed)
 
     # Write to file
     return node.SerializeToString()
@@ -29,16 +36,45 @@ def write_encoded_tree_to_file(tree_bytes):
         fs.write(tree_bytes)
 
 
-def encode_child(tree: TensorIndexTree, child: TensorIndexTree, node, result_size=[]):
+def encode_result(node, result, packed=False):
+    if len(result) == 0:
+        return
+    if packed:
+        node.packed_result = np.asarray(result, dtype=PACKED_RESULT_DTYPE).tobytes()
+    else:
+        node.result.extend(np.asarray(result, dtype=np.float64).tolist())
+
+
+def encode_indexes(node, indexes, packed=False):
+    if len(indexes) == 0:
+        return
+    if packed:
+        node.packed_indexes = np.hstack(indexes).astype(PACKED_INDEXES_DTYPE).tobytes()
+    else:
+        for tree_indexes in indexes:
+            node.indexes.extend(tree_indexes)
+
+
+def hidden_leaves(tree: TensorIndexTree):
+    # The hidden lat/lon leaves below a node, in the order in which their results are laid out in the encoded node
+    for lat_node in tree.children:
+        for lon_node in lat_node.children:
+            if lon_node.hidden:
+                yield (lat_node, lon_node)
+
+
+def encode_child(tree: TensorIndexTree, child: TensorIndexTree, node, result_size=(), packed=False):
     child_node = pb2.Node()
 
-    new_result_size = deepcopy(result_size)
-    new_result_size.append(len(child.values))
+    new_result_size = [*result_size, len(child.values)]
 
     if child.hidden:
         # add indexes to parent and add also indexes size...
-        for tree_indexes in tree.indexes:
-            node.indexes.extend(tree_indexes)
+        encode_indexes(node, tree.indexes, packed)
+        # and the results of the hidden leaves, one after the other, if they were already retrieved
+        leaf_results = [lon_node.result for _, lon_node in hidden_leaves(tree) if len(lon_node.result) != 0]
+        if leaf_results:
+            encode_result(node, np.concatenate([np.asarray(r, dtype=np.float64) for r in leaf_results]), packed)
         break_tag = False
         return break_tag
 
@@ -49,7 +85,7 @@ def encode_child(tree: TensorIndexTree, child: TensorIndexTree, node, result_siz
         child_node.size_result.extend(new_result_size)
 
         for c in child.children:
-            breaking = encode_child(child, c, child_node, new_result_size)
+            breaking = encode_child(child, c, child_node, new_result_size, packed)
             if not breaking:
                 for c_ in child.children:
                     child_node.size_indexes_branch.append(len(c_.children))
@@ -58,6 +94,100 @@ def encode_child(tree: TensorIndexTree, child: TensorIndexTree, node, result_siz
         # we append the children once their branch has been completed until the leaf
         if not child.hidden:
             node.children.append(child_node)
+        return True
+
+
+# NOTE: each chunk of a tree stream is prefixed by its length, and an empty chunk marks the end of the tree
+_CHUNK_HEADER = struct.Struct("<Q")
+
+
+def count_visible_nodes(tree: TensorIndexTree, counts):
+    # Number of nodes in the encoded subtree of each node, ie without the hidden nodes
+    count = 1
+    for child in tree.children:
+        if not child.hidden:
+            count += count_visible_nodes(child, counts)
+    counts[id(tree)] = count
+    return count
+
+
+def encode_chunk(path, parent: TensorIndexTree, subtree: TensorIndexTree, packed=False):
+    # A chunk is a root node with a single branch down to the subtree, so that it can be decoded on its own
+    node = pb2.Node()
+    node.axis = "root"
+    chain_node = node
+    result_size = []
+    for ancestor in path:
+        result_size.append(len(ancestor.values))
+        chain_node = chain_node.children.add()
+        chain_node.axis = ancestor.axis.name
+        chain_node.value.extend(ancestor.values)
+        chain_node.size_result.extend(result_size)
+    encode_child(parent, subtree, chain_node, result_size, packed)
+    return node.SerializeToString()
+
+
+def iter_encoded_chunks(tree: TensorIndexTree, max_chunk_nodes=10000, packed=True):
+    """Yield the tree encoded as a sequence of independent protobuf chunks.
+
+    Each chunk holds a subtree of at most max_chunk_nodes nodes, unless a single node has more children than that,
+    together with the branch leading to it from the root.
+    """
+    counts = {}
+    count_visible_nodes(tree, counts)
+    yield from _iter_encoded_chunks(tree, (), counts, max_chunk_nodes, packed)
+
+
+def _iter_encoded_chunks(tree: TensorIndexTree, path, counts, max_chunk_nodes, packed):
+    for child in tree.children:
+        if child.hidden:
+            continue
+        if counts[id(child)] <= max_chunk_nodes:
+            yield encode_chunk(path, tree, child, packed)
+        else:
+            yield from _iter_encoded_chunks(child, path + (child,), counts, max_chunk_nodes, packed)
+
+
+def write_tree_stream(tree: TensorIndexTree, stream, max_chunk_nodes=10000, packed=True):
+    # The stream can be any binary file-like object, eg an open file or socket.makefile("wb")
+    for chunk in iter_encoded_chunks(tree, max_chunk_nodes, packed):
+        stream.write(_CHUNK_HEADER.pack(len(chunk)))
+        stream.write(chunk)
+    stream.write(_CHUNK_HEADER.pack(0))
+
+
+def _read_exactly(stream, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    num_read = 0
+    while num_read < size:
+        chunk = stream.read(size - num_read)
+        if not chunk:
+            raise EOFError(f"Tree stream ended after {num_read} of {size} expected bytes")
+        view[num_read : num_read + len(chunk)] = chunk
+        num_read += len(chunk)
+    return bytes(buffer)
+
+
+def iter_tree_stream(datacube, stream):
+    # Decode the chunks of a tree stream one at a time, as partial trees which each hold a single branch of the tree
+    while True:
+        (size,) = _CHUNK_HEADER.unpack(_read_exactly(stream, _CHUNK_HEADER.size))
+        if size == 0:
+            return
+        yield decode_tree(datacube, _read_exactly(stream, size))
+
+
+def read_tree_stream(datacube, stream):
+    tree = None
+    for chunk_tree in iter_tree_stream(datacube, stream):
+        if tree is None:
+            tree = chunk_tree
+        else:
+            tree.merge(chunk_tree)
+    if tree is None:
+        tree = TensorIndexTree()
+    return tree
 
 
 def decode_tree(datacube, bytearray):
@@ -79,11 +209,23 @@ def decode_tree(datacube, bytearray):
     return tree
 
 
+def decoded_result(node):
+    if len(node.packed_result) != 0:
+        return np.frombuffer(node.packed_result, dtype=PACKED_RESULT_DTYPE)
+    return node.result
+
+
+def decoded_indexes(node):
+    if len(node.packed_indexes) != 0:
+        return np.frombuffer(node.packed_indexes, dtype=PACKED_INDEXES_DTYPE)
+    return node.indexes
+
+
 def decode_child(node, tree, datacube):
     if len(node.children) == 0:
-        tree.result = node.result
+        tree.result = decoded_result(node)
         tree.result_size = node.size_result
-        tree.indexes = node.indexes
+        tree.indexes = decoded_indexes(node)
         tree.indexes_size = node.size_indexes_branch
     for child in node.children:
         if child.axis in datacube._axes.keys():
@@ -102,7 +244,7 @@ def decode_child(node, tree, datacube):
 
 
 def decode_into_tree(tree, bytearray):
-    # TODO: write a decoder that decodes the bytearray (ie results) from gribjump directly into the tree instance
+    # Decode the bytearray (ie results) from gribjump directly into the tree instance
     node = pb2.Node()
     node.ParseFromString(bytearray)
 
@@ -112,21 +254,19 @@ def decode_into_tree(tree, bytearray):
 
 
 def decode_child_into_tree(tree, node):
-    if not tree.hidden:
-        # iterate through tree
-        for i, child in enumerate(tree.children):
-            node_c = node.children[i]
-            decode_child_into_tree(child, node_c)
-    else:
-        # TODO: if it's hidden, use the sizes to attribute to the hidden lat/lon nodes...
+    # NOTE: the encoded nodes only mirror the nodes of the tree which are not hidden
+    visible_children = [child for child in tree.children if not child.hidden]
+    for child, node_c in zip(visible_children, node.children):
+        decode_child_into_tree(child, node_c)
+
+    if len(visible_children) != len(tree.children):
+        # The results of the hidden lat/lon leaves are laid out one leaf after the other, and each leaf holds one
+        # result per combination of the values on its path
+        results = decoded_result(node)
         num_results = math.prod(node.size_result)
-        num_lat_branches = len(tree.children)
         start_result_idx = 0
-        for i in range(num_lat_branches):
-            lat_node = tree.children[i]
-            num_lon_branches = len(lat_node.children)
-            for j in range(num_lon_branches):
-                lon_node = lat_node.children[j]
-                next_result_idx = start_result_idx + num_results
-                lon_node.result = node.result[start_result_idx:next_result_idx]
-                start_result_idx = next_result_idx
+        for lat_node, lon_node in hidden_leaves(tree):
+            next_result_idx = start_result_idx + num_results * len(lat_node.values) * len(lon_node.values)
+            # NOTE: for packed results, this is a view on the decoded buffer and not a copy
+            lon_node.result = results[start_result_idx:next_result_idx]
+            start_result_idx = next_result_idx
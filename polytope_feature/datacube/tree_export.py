@@ -0,0 +1,169 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from .tensor_index_tree import TensorIndexTree
+
+
+def _leaf_values(leaf, path, num_values):
+    # The values are flattened in row-major order over the path (ie the last axis varies fastest). The FDB backend
+    # stores them as a flat array in that order, with NaN for missing data. The array backends store a (name, array)
+    # tuple whose dimensions, named by leaf.result_dims, can be in another order, so the array is first transposed to
+    # the order of the path. Dimensions which are not axes of the path, like the grid values, are kept last.
+    result = leaf.result
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], np.ndarray):
+        result = result[1]
+        if leaf.result_dims is not None and len(leaf.result_dims) == result.ndim:
+            path_positions = {node.axis.name: i for i, node in enumerate(path)}
+            dims = leaf.result_dims
+            result = np.transpose(
+                result, sorted(range(len(dims)), key=lambda i: path_positions.get(dims[i], len(path_positions)))
+            )
+    if len(result) == 0:
+        return np.full(num_values, np.nan)
+    values = np.asarray(result, dtype=np.float64).reshape(-1)
+    if len(values) != num_values:
+        raise ValueError(f"Leaf {leaf} holds {len(values)} values but its path spans {num_values} values")
+    return values
+
+
+def _column_buffer(value, size, complete):
+    if isinstance(value, pd.Timestamp) or isinstance(value, np.datetime64):
+        return np.full(size, np.datetime64("NaT"), dtype="datetime64[ns]")
+    if isinstance(value, pd.Timedelta) or isinstance(value, np.timedelta64):
+        return np.full(size, np.timedelta64("NaT"), dtype="timedelta64[ns]")
+    if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating)):
+        return np.full(size, None, dtype=object)
+    if isinstance(value, (int, np.integer)) and complete:
+        return np.empty(size, dtype=np.int64)
+    return np.full(size, np.nan)
+
+
+def _column_values(node_values, dtype):
+    if dtype.kind == "M":
+        return pd.to_datetime(list(node_values)).values.astype(dtype)
+    if dtype.kind == "m":
+        return pd.to_timedelta(list(node_values)).values.astype(dtype)
+    if dtype == object:
+        column_values = np.empty(len(node_values), dtype=object)
+        column_values[:] = node_values
+        return column_values
+    return np.asarray(node_values)
+
+
+def _leaf_grid_indexes(leaf, path, grid_axes, mapper):
+    if len(leaf.indexes) == len(leaf.values):
+        return leaf.indexes
+    if mapper is None or mapper.is_irregular or len(path) < 2:
+        return None
+    if (path[-2].axis.name, leaf.axis.name) != tuple(grid_axes):
+        return None
+    return mapper.unmap(path[-2].values, leaf.values)
+
+
+def tree_to_columns(tree: TensorIndexTree, datacube=None):
+    """Return the results of a retrieved tree as flat columns.
+
+    The returned dictionary has one array per axis found on the paths to the leaves, holding the coordinate of each
+    extracted value, and a "values" array of floats with NaN where no data was found. If the datacube is given and has
+    a grid, an "index" array also holds the grid index of each value, or -1 where it is not known.
+    Axes which are not on the path of every leaf are filled with NaN/NaT/None for the leaves which do not have them.
+    """
+    mapper = getattr(datacube, "grid_transformation", None)
+    grid_axes = mapper._mapped_axes() if mapper is not None else ()
+
+    # First find the size of the buffers, then fill them
+    leaves = []
+    axis_sizes = {}
+    first_values = {}
+    total = 0
+    for leaf, path in tree.iter_leaves():
+        if len(path) == 0:
+            continue
+        num_values = math.prod(len(node.values) for node in path)
+        leaves.append((leaf, path, num_values))
+        for node in path:
+            name = node.axis.name
+            axis_sizes[name] = axis_sizes.get(name, 0) + num_values
+            if name not in first_values and len(node.values) > 0:
+                first_values[name] = node.values[0]
+        total += num_values
+
+    columns = {
+        name: _column_buffer(first_values.get(name, None), total, axis_sizes[name] == total) for name in axis_sizes
+    }
+    values = np.empty(total, dtype=np.float64)
+    grid_indexes = np.full(total, -1, dtype=np.int64) if mapper is not None else None
+
+    offset = 0
+    for leaf, path, num_values in leaves:
+        end = offset + num_values
+        outer_size = 1
+        for node in path:
+            inner_size = num_values // (outer_size * len(node.values))
+            node_values = _column_values(node.values, columns[node.axis.name].dtype)
+            columns[node.axis.name][offset:end] = np.repeat(np.tile(node_values, outer_size), inner_size)
+            outer_size *= len(node.values)
+        values[offset:end] = _leaf_values(leaf, path, num_values)
+        if grid_indexes is not None:
+            leaf_indexes = _leaf_grid_indexes(leaf, path, grid_axes, mapper)
+            if leaf_indexes is not None:
+                grid_indexes[offset:end] = np.tile(
+                    np.asarray(leaf_indexes, dtype=np.int64), outer_size // len(leaf.values)
+                )
+        offset = end
+
+    columns["values"] = values
+    if grid_indexes is not None:
+        columns["index"] = grid_indexes
+    return columns
+
+
+def tree_to_dataarray(tree: TensorIndexTree, datacube=None, point_axes=None, name=None):
+    """Return the results of a retrieved tree as a dense xarray.DataArray.
+
+    The grid axes (point_axes, by default the axes of the datacube grid, or latitude/longitude) are stacked into a
+    single "point" dimension, and every other axis becomes a dimension of its own, eg (date, step, number, point) for a
+    timeseries of several points. Combinations which were not extracted are NaN.
+    This is meant for boxes and timeseries, where the extracted values form a (nearly) full tensor product.
+    """
+    import xarray as xr
+
+    columns = tree_to_columns(tree, datacube)
+    values = columns.pop("values")
+    grid_indexes = columns.pop("index", None)
+
+    if point_axes is None:
+        mapper = getattr(datacube, "grid_transformation", None)
+        if mapper is not None:
+            point_axes = list(mapper._mapped_axes())
+        else:
+            point_axes = ["latitude", "longitude"]
+    point_axes = [ax for ax in point_axes if ax in columns]
+    dims = [ax for ax in columns if ax not in point_axes]
+
+    codes = []
+    coords = {}
+    for dim in dims:
+        dim_codes, dim_coords = pd.factorize(columns[dim], sort=True)
+        codes.append(dim_codes)
+        coords[dim] = dim_coords
+    if point_axes:
+        point_keys = [columns[ax] for ax in point_axes]
+        if grid_indexes is not None:
+            point_keys.append(grid_indexes)
+        point_codes, point_uniques = pd.MultiIndex.from_arrays(point_keys).factorize()
+        codes.append(point_codes)
+        for i, ax in enumerate(point_axes):
+            coords[ax] = ("point", point_uniques.get_level_values(i).values)
+        if grid_indexes is not None:
+            coords["index"] = ("point", point_uniques.get_level_values(len(point_axes)).values)
+        dims.append("point")
+
+    shape = tuple(len(coords[dim]) if dim != "point" else len(point_uniques) for dim in dims)
+    data = np.full(shape, np.nan)
+    # NOTE: values with a missing coordinate (code -1) have no place in the dense array
+    is_placed = np.all([dim_codes >= 0 for dim_codes in codes], axis=0) if codes else np.ones(len(values), dtype=bool)
+    data[tuple(dim_codes[is_placed] for dim_codes in codes)] = values[is_placed]
+    return xr.DataArray(data, dims=dims, coords=coords, name=name)
@@ -0,0 +1,142 @@
+import math
+from copy import copy
+
+import numpy as np
+import shapely
+from shapely.geometry.polygon import Polygon
+
+from ..datacube.grid_registry import grid_registry
+from .engine import Engine
+
+
+class PointBuckets:
+    """Uniform bucket index over a 2D point cloud.
+
+    The point indices are sorted by bucket, row after row, so that the points of consecutive buckets along a row are
+    contiguous and can be read as a single slice of self.order.
+    """
+
+    def __init__(self, points, points_per_bucket=32):
+        coords = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.first_vals = coords[:, 0]
+        self.second_vals = coords[:, 1]
+        num_points = len(coords)
+        self.num_buckets = max(1, int(math.ceil(math.sqrt(num_points / points_per_bucket))))
+        if num_points == 0:
+            self.first_min = self.first_max = self.second_min = self.second_max = 0.0
+        else:
+            self.first_min, self.first_max = self.first_vals.min(), self.first_vals.max()
+            self.second_min, self.second_max = self.second_vals.min(), self.second_vals.max()
+        self.first_step = (self.first_max - self.first_min) / self.num_buckets or 1.0
+        self.second_step = (self.second_max - self.second_min) / self.num_buckets or 1.0
+
+        rows = self.bucket_rows(self.first_vals)
+        cols = self.bucket_cols(self.second_vals)
+        bucket_ids = rows * self.num_buckets + cols
+        self.order = np.argsort(bucket_ids, kind="stable")
+        self.sorted_cols = cols[self.order]
+        self.bucket_starts = np.searchsorted(bucket_ids[self.order], np.arange(self.num_buckets * self.num_buckets + 1))
+
+    def bucket_rows(self, first_vals):
+        rows = np.floor((np.asarray(first_vals) - self.first_min) / self.first_step).astype(np.int64)
+        return np.clip(rows, 0, self.num_buckets - 1)
+
+    def bucket_cols(self, second_vals):
+        cols = np.floor((np.asarray(second_vals) - self.second_min) / self.second_step).astype(np.int64)
+        return np.clip(cols, 0, self.num_buckets - 1)
+
+    def query(self, ring):
+        """Return the sorted indices of the points strictly inside the convex polygon ring."""
+        lower = ring.min(axis=0)
+        upper = ring.max(axis=0)
+        if (
+            len(self.order) == 0
+            or upper[0] < self.first_min
+            or lower[0] > self.first_max
+            or upper[1] < self.second_min
+            or lower[1] > self.second_max
+        ):
+            return np.empty(0, dtype=np.int64)
+        polygon = Polygon(ring)
+        first_row, last_row = self.bucket_rows([lower[0], upper[0]])
+        first_col, last_col = self.bucket_cols([lower[1], upper[1]])
+
+        # A bucket whose (slightly inflated) corners are all inside the convex polygon only contains inside points
+        tol = 1e-9 * max(self.first_step, self.second_step)
+        first_edges = self.first_min + np.arange(first_row, last_row + 2) * self.first_step
+        second_edges = self.second_min + np.arange(first_col, last_col + 2) * self.second_step
+        first_lows, first_highs = (first_edges[:-1] - tol)[:, None], (first_edges[1:] + tol)[:, None]
+        second_lows, second_highs = (second_edges[:-1] - tol)[None, :], (second_edges[1:] + tol)[None, :]
+        full_buckets = (
+            shapely.contains_xy(polygon, first_lows, second_lows)
+            & shapely.contains_xy(polygon, first_lows, second_highs)
+            & shapely.contains_xy(polygon, first_highs, second_lows)
+            & shapely.contains_xy(polygon, first_highs, second_highs)
+        )
+
+        inside = []
+        candidates = []
+        for row in range(first_row, last_row + 1):
+            start = self.bucket_starts[row * self.num_buckets + first_col]
+            end = self.bucket_starts[row * self.num_buckets + last_col + 1]
+            if start == end:
+                continue
+            row_indexes = self.order[start:end]
+            in_full_bucket = full_buckets[row - first_row, self.sorted_cols[start:end] - first_col]
+            inside.append(row_indexes[in_full_bucket])
+            candidates.append(row_indexes[~in_full_bucket])
+        if candidates:
+            candidates = np.concatenate(candidates)
+            is_inside = shapely.contains_xy(polygon, self.first_vals[candidates], self.second_vals[candidates])
+            inside.append(candidates[is_inside])
+        if not inside:
+            return np.empty(0, dtype=np.int64)
+        return np.sort(np.concatenate(inside))
+
+
+def convex_ring(points):
+    # The points of a convex polytope are not necessarily ordered along its boundary (eg for boxes),
+    # so order them by angle around the centre
+    ring = np.asarray(points, dtype=np.float64)
+    centre = ring.mean(axis=0)
+    angles = np.arctan2(ring[:, 1] - centre[1], ring[:, 0] - centre[0])
+    return ring[np.argsort(angles, kind="stable")]
+
+
+class BucketedPointInPolygonSlicer(Engine):
+    def __init__(self, points, grid_key=None):
+        # NOTE: the bucket index only depends on the grid, so we share it between all slicers on the same grid
+        self.buckets = grid_registry.get_or_create("point_buckets", grid_key, lambda: PointBuckets(points))
+
+    def extract_single(self, datacube, polytope):
+        # Return the indices in the point cloud of the points inside the polygon
+        ring = convex_ring(polytope.points)
+        if list(polytope.axes()) == ["longitude", "latitude"]:
+            ring = ring[:, ::-1]
+        return self.buckets.query(ring)
+
+    def _build_branch(self, ax, node, datacube, next_nodes, api):
+        for polytope in node["unsliced_polytopes"]:
+            if ax.name in polytope._axes:
+                self._build_sliceable_child(polytope, ax, node, datacube, next_nodes, api)
+        del node["unsliced_polytopes"]
+
+    def _build_sliceable_child(self, polytope, ax, node, datacube, next_nodes, api):
+        extracted_indexes = self.extract_single(datacube, polytope)
+        if len(extracted_indexes) == 0:
+            if len(node.children) == 0:
+                node.remove_branch()
+            return
+
+        lat_ax = ax
+        lon_ax = datacube._axes["longitude"]
+
+        lat_vals = self.buckets.first_vals[extracted_indexes].tolist()
+        lon_vals = self.buckets.second_vals[extracted_indexes].tolist()
+        for value, lat_val, lon_val in zip(extracted_indexes.tolist(), lat_vals, lon_vals):
+            child, _ = node.create_child(lat_ax, lat_val, [])
+            grand_child, _ = child.create_child(lon_ax, lon_val, [])
+            # NOTE: the index of the point in the point cloud is stored in the indexes of the longitude node
+            grand_child.indexes = [value]
+            grand_child["unsliced_polytopes"] = copy(node["unsliced_polytopes"])
+            grand_child["unsliced_polytopes"].remove(polytope)
@@ -13,33 +13,16 @@ class HullSlicer(Engine):
     def _build_unsliceable_child(self, polytope, ax, node, datacube, lowers, next_nodes, slice_axis_idx):
         if not polytope.is_flat:
             raise UnsliceableShapeError(ax)
-        path = node.flatten()
 
         # all unsliceable children are natively 1D so can group them together in a tuple...
-        flattened_tuple = tuple()
-        if len(datacube.coupled_axes) > 0:
-            if path.get(datacube.coupled_axes[0][0], None) is not None:
-                flattened_tuple = (
-                    datacube.coupled_axes[0][0],
-                    path.get(datacube.coupled_axes[0][0], None),
-                )
-                path = {flattened_tuple[0]: flattened_tuple[1]}
+        flattened_tuple, path = self._coupled_path(node.path, datacube)
 
-        # TODO: Restructure this to add all compressed values at once in the tree
-        for i, lower in enumerate(lowers):
+        for lower in lowers:
             if self.axis_values_between.get((flattened_tuple, ax.name, lower), None) is None:
                 self.axis_values_between[(flattened_tuple, ax.name, lower)] = datacube.has_index(path, ax, lower)
             datacube_has_index = self.axis_values_between[(flattened_tuple, ax.name, lower)]
 
-            if datacube_has_index:
-                if i == 0:
-                    child, next_nodes = node.create_child(ax, lower, next_nodes)
-                    child["unsliced_polytopes"] = copy(node["unsliced_polytopes"])
-                    child["unsliced_polytopes"].remove(polytope)
-                    next_nodes.append(child)
-                else:
-                    child.add_value(lower)
-            else:
+            if not datacube_has_index:
                 # raise a value not found error
                 errmsg = (
                     f"Datacube does not have expected index {lower} of type {type(lower)}"
@@ -47,11 +30,28 @@ class HullSlicer(Engine):
                 )
                 raise ValueError(errmsg)
 
+        if len(lowers) != 0:
+            # NOTE: the child is created with all its values at once, so that it is only merged with an existing child
+            # which has the same values
+            child, next_nodes = node.create_child_with_values(ax, sorted(lowers), next_nodes)
+            child["unsliced_polytopes"] = copy(node["unsliced_polytopes"])
+            child["unsliced_polytopes"].remove(polytope)
+            next_nodes.append(child)
+
+    def _coupled_path(self, path, datacube):
+        # NOTE: the path is the cached tuple of (axis name, values) pairs of the node, which we do not need to copy.
+        # If there are coupled axes, only the first coupled axis on the path matters for the indexes.
+        if len(datacube.coupled_axes) > 0:
+            coupled_axis = datacube.coupled_axes[0][0]
+            for name, values in path:
+                if name == coupled_axis:
+                    return ((coupled_axis, values), {coupled_axis: values})
+        return (tuple(), path)
+
     def find_values_between(self, polytope, ax, node, datacube, lower, upper):
         tol = ax.tol
         lower = ax.from_float(lower - tol)
         upper = ax.from_float(upper + tol)
-        flattened = node.flatten()
         method = polytope.method
 
         # NOTE: caching
@@ -60,14 +60,7 @@ class HullSlicer(Engine):
         # corresponds to the first place of cooupled_axes in the hashing
         # Else, if we do not need the flattened bit in the hash, can just put an empty string instead?
 
-        flattened_tuple = tuple()
-        if len(datacube.coupled_axes) > 0:
-            if flattened.get(datacube.coupled_axes[0][0], None) is not None:
-                flattened_tuple = (
-                    datacube.coupled_axes[0][0],
-                    flattened.get(datacube.coupled_axes[0][0], None),
-                )
-                flattened = {flattened_tuple[0]: flattened_tuple[1]}
+        flattened_tuple, flattened = self._coupled_path(node.path, datacube)
 
         values = self.axis_values_between.get((flattened_tuple, ax.name, lower, upper, method), None)
         if values is None:
@@ -88,21 +81,22 @@ class HullSlicer(Engine):
         return remapped_val
 
     def _build_sliceable_child(self, polytope, ax, node, datacube, values, next_nodes, slice_axis_idx, api):
-        # TODO: Restructure this to add all compressed values at once in the tree
-        for i, value in enumerate(values):
-            if i == 0 or ax.name not in api.compressed_axes:
-                fvalue = ax.to_float(value)
-                new_polytope = slice(polytope, ax.name, fvalue, slice_axis_idx)
-                remapped_val = self.remap_values(ax, value)
-                child, next_nodes = node.create_child(ax, remapped_val, next_nodes)
-                child["unsliced_polytopes"] = copy(node["unsliced_polytopes"])
-                child["unsliced_polytopes"].remove(polytope)
-                if new_polytope is not None:
-                    child["unsliced_polytopes"].add(new_polytope)
-                next_nodes.append(child)
+        # NOTE: on a compressed axis, all the values go in a single child sliced at the first value, which is created
+        # with all its values at once so that it is only merged with an existing child which has the same values
+        compressed = ax.name in api.compressed_axes
+        for value in values[:1] if compressed else values:
+            fvalue = ax.to_float(value)
+            new_polytope = slice(polytope, ax.name, fvalue, slice_axis_idx)
+            if compressed:
+                remapped_vals = sorted(self.remap_values(ax, val) for val in values)
             else:
-                remapped_val = self.remap_values(ax, value)
-                child.add_value(remapped_val)
+                remapped_vals = [self.remap_values(ax, value)]
+            child, next_nodes = node.create_child_with_values(ax, remapped_vals, next_nodes)
+            child["unsliced_polytopes"] = copy(node["unsliced_polytopes"])
+            child["unsliced_polytopes"].remove(polytope)
+            if new_polytope is not None:
+                child["unsliced_polytopes"].add(new_polytope)
+            next_nodes.append(child)
 
     def _build_branch(self, ax, node, datacube, next_nodes, api):
         if ax.name not in api.compressed_axes:
@@ -176,7 +170,7 @@ class HullSlicer(Engine):
                     first_slice_axis_idx,
                 )
             else:
-                if len(all_values) == 0:
+                if len(all_values) == 0 and len(node.children) == 0:
                     node.remove_branch()
                 self._build_sliceable_child(
                     first_polytope,
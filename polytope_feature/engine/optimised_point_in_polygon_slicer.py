@@ -1,6 +1,7 @@
 from copy import copy
 
 from ..datacube.datacube_axis import IntDatacubeAxis
+from ..datacube.grid_registry import grid_registry
 from ..datacube.tensor_index_tree import TensorIndexTree
 from .engine import Engine
 
@@ -12,16 +13,22 @@ try:
 except (ModuleNotFoundError, ImportError) as e:
     print(f"Failed to load Rust extension with error: {e}, falling back to Python implementation.")
 
-    from shapely.geometry import Point
+    import numpy as np
+    import shapely
     from shapely.geometry.polygon import Polygon
 
 
 class OptimisedPointInPolygonSlicer(Engine):
-    def __init__(self, points):
-        points = [tuple(point) for point in points]
-        self.points = points
+    def __init__(self, points, grid_key=None):
+        self.points = grid_registry.get_or_create("point_tuples", grid_key, lambda: [tuple(point) for point in points])
         self.bbox_points = []
-        self._points = {point: i for i, point in enumerate(self.points)}
+        self._points = grid_registry.get_or_create(
+            "point_index_map", grid_key, lambda: {point: i for i, point in enumerate(self.points)}
+        )
+        if not use_rust:
+            self.points_array = grid_registry.get_or_create(
+                "point_array", grid_key, lambda: np.asarray(self.points, dtype=np.float64).reshape(-1, 2)
+            )
 
     def find_point_index(self, point):
         index = self._points[point]
@@ -52,13 +59,13 @@ class OptimisedPointInPolygonSlicer(Engine):
         return request
 
     def find_points_in_bbox(self, polytope):
-        self.bbox_points = []
         bbox_x_range = polytope.extents(polytope.axes()[0])[:2]
         bbox_y_range = polytope.extents(polytope.axes()[1])[:2]
-        for point in self.points:
-            if bbox_x_range[0] <= point[0] <= bbox_x_range[1]:
-                if bbox_y_range[0] <= point[1] <= bbox_y_range[1]:
-                    self.bbox_points.append(point)
+        xs = self.points_array[:, 0]
+        ys = self.points_array[:, 1]
+        in_bbox = (bbox_x_range[0] <= xs) & (xs <= bbox_x_range[1]) & (bbox_y_range[0] <= ys) & (ys <= bbox_y_range[1])
+        self.bbox_indexes = np.flatnonzero(in_bbox)
+        self.bbox_points = [self.points[i] for i in self.bbox_indexes]
 
     def extract_single(self, datacube, polytope):
         # extract a single polygon
@@ -74,12 +81,11 @@ class OptimisedPointInPolygonSlicer(Engine):
         else:
             self.find_points_in_bbox(polytope)
 
-            found_points = []
+            # test all the candidates at once, with the same boundary semantics as the Rust extension
             polygon = Polygon(polytope.points)
-            for point in self.bbox_points:
-                new_point = Point(point[0], point[1])
-                if polygon.contains(new_point):
-                    found_points.append(point)
+            bbox_coords = self.points_array[self.bbox_indexes]
+            is_inside = shapely.contains_xy(polygon, bbox_coords[:, 0], bbox_coords[:, 1])
+            found_points = [self.points[i] for i in self.bbox_indexes[is_inside]]
         return found_points
 
     def _build_branch(self, ax, node, datacube, next_nodes, api):
@@ -97,7 +103,7 @@ class OptimisedPointInPolygonSlicer(Engine):
     def _build_sliceable_child(self, polytope, ax, node, datacube, next_nodes, api):
         extracted_points = self.extract_single(datacube, polytope)
         # TODO: add the sliced points as node to the tree and update the next_nodes
-        if len(extracted_points) == 0:
+        if len(extracted_points) == 0 and len(node.children) == 0:
             node.remove_branch()
 
         lat_ax = ax
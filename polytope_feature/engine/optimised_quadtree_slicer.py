@@ -3,6 +3,7 @@
 
 from copy import copy
 
+from ..datacube.grid_registry import grid_registry
 from .engine import Engine
 
 use_rust = False
@@ -17,13 +18,13 @@ except (ModuleNotFoundError, ImportError) as e:
 
 
 class OptimisedQuadTreeSlicer(Engine):
-    def __init__(self, points):
+    def __init__(self, points, grid_key=None):
         # here need to construct quadtree, which is specific to datacube
         # NOTE: should this be inside of the datacube instead that we create the quadtree?
         # TODO: maybe we create the quadtree as soon as we have an unstructured slicer type and return it
         # to the slicer somehow?
         # quad_tree = QuadTree()
-        self.points = [tuple(point) for point in points]
+        self.points = grid_registry.get_or_create("point_tuples", grid_key, lambda: [tuple(point) for point in points])
         # self.find_points_in_bbox(points, polytope)
         # quad_tree.build_point_tree(points)
         # self.points = points
@@ -68,7 +69,7 @@ class OptimisedQuadTreeSlicer(Engine):
 
     def _build_sliceable_child(self, polytope, ax, node, datacube, next_nodes, api):
         extracted_points = self.extract_single(datacube, polytope)
-        if len(extracted_points) == 0:
+        if len(extracted_points) == 0 and len(node.children) == 0:
             node.remove_branch()
         lat_ax = ax
         lon_ax = datacube._axes["longitude"]
@@ -1,6 +1,7 @@
 from copy import copy
 
 from ..datacube.datacube_axis import IntDatacubeAxis
+from ..datacube.grid_registry import grid_registry
 from ..datacube.tensor_index_tree import TensorIndexTree
 from .engine import Engine
 
@@ -12,14 +13,21 @@ try:
 except (ModuleNotFoundError, ImportError) as e:
     print(f"Failed to load Rust extension with error: {e}, falling back to Python implementation.")
 
-    from shapely.geometry import Point
+    import numpy as np
+    import shapely
     from shapely.geometry.polygon import Polygon
 
 
 class PointInPolygonSlicer(Engine):
-    def __init__(self, points):
+    def __init__(self, points, grid_key=None):
         self.points = points
-        self._points = {point: i for i, point in enumerate(self.points)}
+        self._points = grid_registry.get_or_create(
+            "point_index_map", grid_key, lambda: {point: i for i, point in enumerate(self.points)}
+        )
+        if not use_rust:
+            self.points_array = grid_registry.get_or_create(
+                "point_array", grid_key, lambda: np.asarray(self.points, dtype=np.float64).reshape(-1, 2)
+            )
 
     def find_point_index(self, point):
         index = self._points[point]
@@ -58,12 +66,10 @@ class PointInPolygonSlicer(Engine):
             polytope_points = [tuple(point) for point in polytope.points]
             found_points = extract_point_in_poly(self.points, polytope_points)
         else:
-            found_points = []
-            for point in self.points:
-                new_point = Point(point[0], point[1])
-                polygon = Polygon(polytope.points)
-                if polygon.contains(new_point):
-                    found_points.append(point)
+            # test all the points at once, with the same boundary semantics as the Rust extension
+            polygon = Polygon(polytope.points)
+            is_inside = shapely.contains_xy(polygon, self.points_array[:, 0], self.points_array[:, 1])
+            found_points = [self.points[i] for i in np.flatnonzero(is_inside)]
         return found_points
 
     def _build_branch(self, ax, node, datacube, next_nodes, api):
@@ -81,7 +87,7 @@ class PointInPolygonSlicer(Engine):
     def _build_sliceable_child(self, polytope, ax, node, datacube, next_nodes, api):
         extracted_points = self.extract_single(datacube, polytope)
         # TODO: add the sliced points as node to the tree and update the next_nodes
-        if len(extracted_points) == 0:
+        if len(extracted_points) == 0 and len(node.children) == 0:
             node.remove_branch()
 
         lat_ax = ax
@@ -1,5 +1,6 @@
 from copy import copy
 
+from ..datacube.grid_registry import grid_registry
 from .engine import Engine
 
 use_rust = False
@@ -13,17 +14,20 @@ except (ModuleNotFoundError, ImportError) as e:
 
 
 class QuadTreeSlicer(Engine):
-    def __init__(self, points):
+    def __init__(self, points, grid_key=None):
         # here need to construct quadtree, which is specific to datacube
-        # NOTE: should this be inside of the datacube instead that we create the quadtree?
-        # TODO: maybe we create the quadtree as soon as we have an unstructured slicer type and return it
-        # to the slicer somehow?
+        # NOTE: the quadtree only depends on the grid, so we share it between all slicers on the same grid
+        self.points, self.quad_tree = grid_registry.get_or_create(
+            "quadtree", grid_key, lambda: self.build_quad_tree(points)
+        )
+
+    @staticmethod
+    def build_quad_tree(points):
         quad_tree = QuadTree()
         # NOTE: the points here are assumed to be lat/lon implicitly
         points = [tuple(point) for point in points]
         quad_tree.build_point_tree(points)
-        self.points = points
-        self.quad_tree = quad_tree
+        return (points, quad_tree)
 
     def extract_single(self, datacube, polytope):
         # extract a single polygon
@@ -62,7 +66,7 @@ class QuadTreeSlicer(Engine):
 
     def _build_sliceable_child(self, polytope, ax, node, datacube, next_nodes, api):
         extracted_points = self.extract_single(datacube, polytope)
-        if len(extracted_points) == 0:
+        if len(extracted_points) == 0 and len(node.children) == 0:
             node.remove_branch()
         lat_ax = ax
         lon_ax = datacube._axes["longitude"]
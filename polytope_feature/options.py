@@ -86,6 +86,13 @@ class Config(ConfigModel):
     use_catalogue: Optional[bool] = False
     engine_options: Optional[Dict[str, str]] = {}
     dynamic_grid: Optional[bool] = False
+    range_gap_tolerance: Optional[int] = 0
+    extract_chunk_size: Optional[int] = 0
+    extract_max_workers: Optional[int] = 1
+    coalesce_extracts: Optional[bool] = False
+    extract_cache_size: Optional[int] = 0
+    extract_cache_dir: Optional[str] = None
+    extract_cache_disk_size: Optional[int] = None
 
 
 class PolytopeOptions(ABC):
@@ -102,6 +109,13 @@ class PolytopeOptions(ABC):
         alternative_axes = config_options.alternative_axes
         use_catalogue = config_options.use_catalogue
         engine_options = config_options.engine_options
+        range_gap_tolerance = config_options.range_gap_tolerance
+        extract_chunk_size = config_options.extract_chunk_size
+        extract_max_workers = config_options.extract_max_workers
+        coalesce_extracts = config_options.coalesce_extracts
+        extract_cache_size = config_options.extract_cache_size
+        extract_cache_dir = config_options.extract_cache_dir
+        extract_cache_disk_size = config_options.extract_cache_disk_size
 
         if dynamic_grid:
             # TODO: look at the pre-path and query the eccodes function to get the new grid option
@@ -123,6 +137,13 @@ class PolytopeOptions(ABC):
             alternative_axes,
             use_catalogue,
             engine_options,
+            range_gap_tolerance,
+            extract_chunk_size,
+            extract_max_workers,
+            coalesce_extracts,
+            extract_cache_size,
+            extract_cache_dir,
+            extract_cache_disk_size,
         )
 
 
@@ -4,6 +4,7 @@ from typing import List
 from .datacube.backends.datacube import Datacube
 from .datacube.datacube_axis import UnsliceableDatacubeAxis
 from .datacube.tensor_index_tree import TensorIndexTree
+from .engine.bucketed_point_in_polygon_slicer import BucketedPointInPolygonSlicer
 from .engine.hullslicer import HullSlicer
 from .engine.optimised_point_in_polygon_slicer import OptimisedPointInPolygonSlicer
 from .engine.optimised_quadtree_slicer import OptimisedQuadTreeSlicer
@@ -70,6 +71,13 @@ class Polytope:
             alternative_axes,
             use_catalogue,
             engine_options,
+            range_gap_tolerance,
+            extract_chunk_size,
+            extract_max_workers,
+            coalesce_extracts,
+            extract_cache_size,
+            extract_cache_dir,
+            extract_cache_disk_size,
         ) = PolytopeOptions.get_polytope_options(options)
         self.datacube = Datacube.create(
             datacube,
@@ -79,6 +87,13 @@ class Polytope:
             alternative_axes,
             use_catalogue,
             self.context,
+            range_gap_tolerance,
+            extract_chunk_size,
+            extract_max_workers,
+            coalesce_extracts,
+            extract_cache_size,
+            extract_cache_dir,
+            extract_cache_disk_size,
         )
         if engine_options == {}:
             for ax_name in self.datacube._axes.keys():
@@ -90,22 +105,29 @@ class Polytope:
     def create_engines(self):
         engines = {}
         engine_types = set(self.engine_options.values())
+        # NOTE: the point cloud and the spatial indexes built on it are shared through the grid registry
+        grid_key = self.datacube.grid_key
+        point_cloud_engines = {
+            "quadtree",
+            "optimised_quadtree",
+            "point_in_polygon",
+            "optimised_point_in_polygon",
+            "bucketed_point_in_polygon",
+        }
+        if engine_types & point_cloud_engines:
+            points = self.datacube.find_point_cloud()
         if "quadtree" in engine_types:
-            # TODO: need to get the corresponding point cloud from the datacube
-            quadtree_points = self.datacube.find_point_cloud()
-            engines["quadtree"] = QuadTreeSlicer(quadtree_points)
+            engines["quadtree"] = QuadTreeSlicer(points, grid_key)
         if "optimised_quadtree" in engine_types:
-            # TODO: need to get the corresponding point cloud from the datacube
-            quadtree_points = self.datacube.find_point_cloud()
-            engines["optimised_quadtree"] = OptimisedQuadTreeSlicer(quadtree_points)
+            engines["optimised_quadtree"] = OptimisedQuadTreeSlicer(points, grid_key)
         if "hullslicer" in engine_types:
             engines["hullslicer"] = HullSlicer()
         if "point_in_polygon" in engine_types:
-            points = self.datacube.find_point_cloud()
-            engines["point_in_polygon"] = PointInPolygonSlicer(points)
+            engines["point_in_polygon"] = PointInPolygonSlicer(points, grid_key)
         if "optimised_point_in_polygon" in engine_types:
-            points = self.datacube.find_point_cloud()
-            engines["optimised_point_in_polygon"] = OptimisedPointInPolygonSlicer(points)
+            engines["optimised_point_in_polygon"] = OptimisedPointInPolygonSlicer(points, grid_key)
+        if "bucketed_point_in_polygon" in engine_types:
+            engines["bucketed_point_in_polygon"] = BucketedPointInPolygonSlicer(points, grid_key)
         return engines
 
     def _unique_continuous_points(self, p: ConvexPolytope, datacube: Datacube):
@@ -140,27 +162,23 @@ class Polytope:
         request = TensorIndexTree()
         combinations = tensor_product(groups)
 
-        # NOTE: could optimise here if we know combinations will always be for one request.
-        # Then we do not need to create a new index tree and merge it to request, but can just
-        # directly work on request and return it...
-
-        for c in combinations:
-            r = TensorIndexTree()
-            new_c = []
-            for combi in c:
-                if isinstance(combi, list):
-                    new_c.extend(combi)
-                else:
-                    new_c.append(combi)
-            final_polys = []
-            for poly in new_c:
-                if isinstance(poly, Product):
-                    final_polys.extend(poly.polytope())
-                else:
-                    final_polys.append(poly)
-            r["unsliced_polytopes"] = set(final_polys)
-            current_nodes = [r]
-            for ax in datacube.axes.values():
+        # NOTE: all the combinations are sliced into the request tree itself. Consecutive combinations often only
+        # differ in the polytopes of their last axes, in which case the next combination carries on from the nodes
+        # this combination reached on the first layer where they differ, and only builds the layers below it
+        axes = list(datacube.axes.values())
+        first_layers = self._group_first_layers(groups, axes)
+        frontiers = {0: ([(request, [])], {}, 0)}
+        for j, c in enumerate(combinations):
+            # the deepest frontier left is on the first layer where this combination differs from the previous ones
+            current_nodes, start_layer = self._resume_from_frontier(frontiers[max(frontiers)], c, first_layers)
+            next_layer = 0
+            if j < len(combinations) - 1:
+                next_layer = self._divergence_layer(c, combinations[j + 1], first_layers)
+            shared_branches = []
+            for i in range(start_layer, len(axes)):
+                ax = axes[i]
+                if i == next_layer:
+                    frontiers[i] = self._save_frontier(current_nodes, c, first_layers, i)
                 engine = self.find_engine(ax)
                 next_nodes = []
                 interm_next_nodes = []
@@ -168,11 +186,133 @@ class Polytope:
                     engine._build_branch(ax, node, datacube, interm_next_nodes, self)
                     next_nodes.extend(interm_next_nodes)
                     interm_next_nodes = []
+                # NOTE: the next combination carries on from the nodes of its first layer, so only the branches below
+                # that layer can be shared
+                if next_layer <= i < len(axes) - 1 and self._can_share_branches(ax, datacube):
+                    remaining_axes = set(ax.name for ax in axes[i + 1 :])
+                    next_nodes = self._share_identical_branches(next_nodes, remaining_axes, shared_branches)
                 current_nodes = next_nodes
 
-            request.merge(r)
+            self._expand_shared_branches(shared_branches)
+            # the frontiers below the first layer where the next combination differs do not apply to it
+            for layer in [layer for layer in frontiers if layer > next_layer]:
+                del frontiers[layer]
         return request
 
+    def _combination_polytopes(self, combination):
+        new_c = []
+        for combi in combination:
+            if isinstance(combi, list):
+                new_c.extend(combi)
+            else:
+                new_c.append(combi)
+        final_polys = []
+        for poly in new_c:
+            if isinstance(poly, Product):
+                final_polys.extend(poly.polytope())
+            else:
+                final_polys.append(poly)
+        return final_polys
+
+    def _group_first_layers(self, groups, axes):
+        # The first layer of the tree, ie the index of the first datacube axis, which each group of polytopes slices
+        axis_layers = {ax.name: i for i, ax in enumerate(axes)}
+        return [min(axis_layers[ax_name] for ax_name in group_axes) for group_axes in groups.keys()]
+
+    def _divergence_layer(self, combination, other_combination, first_layers):
+        # The first layer of the tree which is sliced by different polytopes in the two combinations
+        layers = [
+            first_layer
+            for first_layer, choice, other_choice in zip(first_layers, combination, other_combination)
+            if choice is not other_choice
+        ]
+        return min(layers, default=0)
+
+    def _layer_polytopes(self, combination, first_layers, layer):
+        # The polytopes of the combination which are first sliced on or below the given layer
+        return self._combination_polytopes(
+            [choice for first_layer, choice in zip(first_layers, combination) if first_layer >= layer]
+        )
+
+    def _save_frontier(self, nodes, combination, first_layers, layer):
+        # Keep the nodes of the given layer with the polytopes left to slice below them which the next combination
+        # shares with this one, and the parents of these nodes and of their ancestors
+        layer_polytopes = set(id(polytope) for polytope in self._layer_polytopes(combination, first_layers, layer))
+        frontier_nodes = []
+        parents = {}
+        for node in nodes:
+            if node.parent is None and node.axis.name != "root":
+                # the node was removed from the tree in the meantime
+                continue
+            shared_polytopes = [p for p in node["unsliced_polytopes"] if id(p) not in layer_polytopes]
+            frontier_nodes.append((node, shared_polytopes))
+            while node.parent is not None and id(node) not in parents:
+                parents[id(node)] = node.parent
+                node = node.parent
+        return (frontier_nodes, parents, layer)
+
+    def _resume_from_frontier(self, frontier, combination, first_layers):
+        # NOTE: the polytopes of the groups which start on or below the frontier layer have not been sliced yet, so
+        # they are simply replaced by the polytopes of this combination
+        frontier_nodes, parents, layer = frontier
+        layer_polytopes = self._layer_polytopes(combination, first_layers, layer)
+        current_nodes = []
+        for node, shared_polytopes in frontier_nodes:
+            self._restore_branch(node, parents)
+            node["unsliced_polytopes"] = set(shared_polytopes)
+            node["unsliced_polytopes"].update(layer_polytopes)
+            current_nodes.append(node)
+        return (current_nodes, layer)
+
+    def _restore_branch(self, node, parents):
+        # An earlier combination may have removed the node, and some of its ancestors, from the tree as it found no
+        # data below them, so we put them back before slicing the next combination below the node
+        removed_nodes = []
+        while node.parent is None and id(node) in parents:
+            removed_nodes.append(node)
+            node = parents[id(node)]
+        for node in reversed(removed_nodes):
+            parents[id(node)].add_child(node)
+
+    def _can_share_branches(self, ax, datacube):
+        # The subtrees below two sibling nodes are only identical if none of the index lookups below them depend on the
+        # values of the siblings, which is the case for the plain axes of the datacube
+        if ax.name not in datacube.complete_axes or ax.name in datacube.fake_axes:
+            return False
+        if ax.name in datacube.transformed_axes or ax.name in datacube.merged_axes:
+            return False
+        return not any(ax.name in coupled_axes for coupled_axes in datacube.coupled_axes)
+
+    def _share_identical_branches(self, nodes, remaining_axes, shared_branches):
+        # Sibling nodes which still need to be sliced by the same polytopes get identical subtrees, so we only slice
+        # below the first of them and copy its subtree to the others once the whole tree has been sliced.
+        # NOTE: the datacubes assign a result to every leaf, so the copies are still made before the data is retrieved
+        # and the size of the request tree still grows with the product of the axis sizes. Only the slicing is shared.
+        representatives = {}
+        remaining_nodes = []
+        for node in nodes:
+            if len(node.children) != 0:
+                # an earlier combination already built a subtree below the node
+                remaining_nodes.append(node)
+                continue
+            key = (id(node.parent), _polytopes_key(node["unsliced_polytopes"], remaining_axes))
+            representative = representatives.setdefault(key, node)
+            if representative is node:
+                remaining_nodes.append(node)
+            else:
+                del node["unsliced_polytopes"]
+                shared_branches.append((node, representative))
+        return remaining_nodes
+
+    def _expand_shared_branches(self, shared_branches):
+        # NOTE: the deepest branches are expanded first so that the subtrees we copy are already complete
+        for node, representative in reversed(shared_branches):
+            if representative.parent is None:
+                # the representative branch was empty and was removed
+                node.remove_branch()
+            else:
+                node.copy_children(representative)
+
     def find_engine(self, ax):
         slicer_type = self.engine_options[ax.name]
         return self.engines[slicer_type]
@@ -238,3 +378,24 @@ class Polytope:
                     if axis in self.compressed_axes:
                         if axis == self.compressed_axes[-1]:
                             self.compressed_axes.remove(axis)
+
+
+def _polytopes_key(polytopes, remaining_axes):
+    # NOTE: the polytopes which are only defined on axes that were already sliced do not matter anymore
+    keys = []
+    for polytope in polytopes:
+        if remaining_axes.isdisjoint(polytope.axes()):
+            continue
+        key = (
+            tuple(polytope.axes()),
+            tuple(tuple(point) for point in polytope.points),
+            polytope.method,
+            polytope.k,
+            polytope.is_in_union,
+        )
+        try:
+            hash(key)
+        except TypeError:
+            key = id(polytope)
+        keys.append(key)
+    return frozenset(keys)
@@ -1,5 +1,8 @@
 import math
 
+import numpy as np
+from scipy.spatial import cKDTree
+
 
 def lerp(a, b, value):
     intersect = [b + (a - b) * value for a, b in zip(a, b)]
@@ -30,5 +33,35 @@ def nearest_pt(pts_list, pt, k=1):
     return best
 
 
+def nearest_pt_indexes(candidate_pts, pts, k=1):
+    """Return the indexes in candidate_pts of the k nearest candidates to each of pts.
+
+    candidate_pts and pts are sequences of (first, second) coordinates. The candidates are put in a k-d tree, so this
+    scales to many points. Candidates at the same distance are ordered like in nearest_pt, ie by their index.
+    Returns an array of shape (len(pts), min(k, len(candidate_pts))).
+    """
+    candidate_pts = np.asarray(candidate_pts, dtype=np.float64).reshape(-1, 2)
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    k = min(k, len(candidate_pts))
+    if k == 0 or len(pts) == 0:
+        return np.empty((len(pts), k), dtype=np.int64)
+
+    tree = cKDTree(candidate_pts)
+    dists, idxs = tree.query(pts, k=k)
+    dists = dists.reshape(len(pts), k)
+    idxs = idxs.reshape(len(pts), k)
+    idxs = np.take_along_axis(idxs, np.lexsort((idxs, dists)), axis=1)
+    # The k-d tree breaks ties arbitrarily, so look again at all the candidates within the k-th distance if there
+    # are more of them than k
+    tol = 1e-12 * np.maximum(1, dists[:, -1])
+    num_within = tree.query_ball_point(pts, dists[:, -1] + tol, return_length=True)
+    for i in np.nonzero(num_within > k)[0]:
+        within = np.asarray(tree.query_ball_point(pts[i], dists[i, -1] + tol[i]), dtype=np.int64)
+        diffs = candidate_pts[within] - pts[i]
+        within_dists = np.sqrt(diffs[:, 0] * diffs[:, 0] + diffs[:, 1] * diffs[:, 1])
+        idxs[i] = within[np.lexsort((within, within_dists))[:k]]
+    return idxs
+
+
 def l2_norm(pt1, pt2):
     return math.sqrt((pt1[0] - pt2[0]) * (pt1[0] - pt2[0]) + (pt1[1] - pt2[1]) * (pt1[1] - pt2[1]))
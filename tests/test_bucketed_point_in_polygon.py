@@ -0,0 +1,88 @@
+import numpy as np
+import xarray as xr
+from shapely.geometry import Point
+from shapely.geometry.polygon import Polygon
+
+from polytope_feature.engine.bucketed_point_in_polygon_slicer import (
+    PointBuckets,
+    convex_ring,
+)
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, ConvexPolytope
+
+
+class TestBucketedPointInPolygon:
+    def setup_method(self, method):
+        self.array = xr.DataArray(
+            np.random.randn(6, 129, 100),
+            dims=("step", "level", "values"),
+            coords={
+                "step": [0, 3, 6, 9, 12, 15],
+                "level": range(1, 130),
+                "values": range(0, 100),
+            },
+        )
+        self.engine_options = {
+            "step": "hullslicer",
+            "level": "hullslicer",
+            "latitude": "bucketed_point_in_polygon",
+            "longitude": "bucketed_point_in_polygon",
+        }
+        self.points = [[10, 10], [80, 10], [-5, 5], [5, 20], [5, 10], [50, 10]]
+        self.options = {
+            "axis_config": [
+                {
+                    "axis_name": "values",
+                    "transformations": [
+                        {
+                            "name": "mapper",
+                            "type": "unstructured",
+                            "resolution": 1280,
+                            "axes": ["latitude", "longitude"],
+                            "points": self.points,
+                        }
+                    ],
+                },
+            ],
+            "engine_options": self.engine_options,
+        }
+
+    def test_query_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        points = np.column_stack([rng.uniform(-90, 90, 20000), rng.uniform(0, 360, 20000)])
+        buckets = PointBuckets(points)
+        polygons = [
+            [[-10, 20], [30, 20], [30, 80], [-10, 80]],
+            [[0, 0], [60, 100], [-40, 250]],
+            [[89, 359], [89.5, 359], [89.5, 359.5]],
+            [[100, 400], [110, 400], [110, 410]],
+        ]
+        for polygon_points in polygons:
+            polygon = Polygon(polygon_points)
+            expected = [i for i, pt in enumerate(points) if polygon.contains(Point(pt[0], pt[1]))]
+            found = buckets.query(convex_ring(polygon_points))
+            assert found.tolist() == expected
+
+    def test_box_vertices_are_ordered(self):
+        buckets = PointBuckets(self.points)
+        box = Box(["latitude", "longitude"], [0, 0], [20, 20]).polytope()[0]
+        assert buckets.query(convex_ring(box.points)).tolist() == [0, 4]
+
+    def test_empty_polygon(self):
+        buckets = PointBuckets(self.points)
+        triangle = ConvexPolytope(["latitude", "longitude"], [[1, 1], [2, 2], [3, 3]])
+        assert len(buckets.query(convex_ring(triangle.points))) == 0
+
+    def test_2D_box(self):
+        request = Request(
+            Box(["step", "level"], [3, 10], [6, 11]),
+            Box(["latitude", "longitude"], [0, 0], [20, 20]),
+        )
+        self.API = Polytope(
+            datacube=self.array,
+            options=self.options,
+        )
+        result = self.API.retrieve(request)
+        # NOTE: the point (5, 20) lies on the boundary of the box and is not contained in it
+        assert len(result.leaves) == 8
+        assert sorted(set(leaf.indexes[0] for leaf in result.leaves)) == [0, 4]
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from polytope_feature.datacube.backends.catalogue_helper import CatalogueClient
+from polytope_feature.utility.exceptions import HTTPError
+
+
+class CatalogueHandler(BaseHTTPRequestHandler):
+    # NOTE: HTTP/1.1 keeps the connections open, so that we can check they are reused
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((parse_qs(urlparse(self.path).query), dict(self.headers)))
+        server.client_ports.add(self.client_address[1])
+        if server.status != 200:
+            self.send_response(server.status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match", None) == server.etag:
+            self.send_response(304)
+            self.send_header("ETag", server.etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(server.body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestCatalogueClient:
+    def setup_method(self, method):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CatalogueHandler)
+        self.server.requests = []
+        self.server.client_ports = set()
+        self.server.status = 200
+        self.server.etag = '"v1"'
+        self.server.body = {"step": [0, 1]}
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/select/"
+        self.parsed = []
+
+    def teardown_method(self, method):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def parse(self, body):
+        self.parsed.append(body)
+        return body
+
+    def test_cached_lookups(self):
+        client = CatalogueClient(self.url)
+        assert client.select({"class": "od"}, self.parse) == {"step": [0, 1]}
+        assert client.select({"class": "od"}, self.parse) == {"step": [0, 1]}
+        assert len(self.server.requests) == 1
+        assert self.server.requests[0][0] == {"class": ["od"]}
+
+        client.select({"class": "rd"}, self.parse)
+        assert len(self.server.requests) == 2
+        assert len(self.parsed) == 2
+        # the connection was kept open for the second lookup
+        assert len(self.server.client_ports) == 1
+
+    def test_revalidation(self):
+        client = CatalogueClient(self.url, ttl=0)
+        client.select({"class": "od"}, self.parse)
+        assert client.select({"class": "od"}, self.parse) == {"step": [0, 1]}
+        assert len(self.server.requests) == 2
+        assert self.server.requests[1][1]["If-None-Match"] == '"v1"'
+        assert len(self.parsed) == 1
+
+        self.server.etag = '"v2"'
+        self.server.body = {"step": [0, 1, 2]}
+        assert client.select({"class": "od"}, self.parse) == {"step": [0, 1, 2]}
+        assert len(self.parsed) == 2
+
+    def test_errors(self):
+        client = CatalogueClient(self.url, ttl=0)
+        self.server.status = 500
+        with pytest.raises(HTTPError):
+            client.select({"class": "od"}, self.parse)
+
+        # the last response is used while the catalogue fails
+        self.server.status = 200
+        client.select({"class": "od"}, self.parse)
+        self.server.status = 500
+        assert client.select({"class": "od"}, self.parse) == {"step": [0, 1]}
+
+    def test_async_lookups(self):
+        client = CatalogueClient(self.url)
+
+        async def select_all():
+            pre_paths = [{"class": "od"}, {"class": "od"}, {"class": "rd"}]
+            return await asyncio.gather(*[client.select_async(pre_path, self.parse) for pre_path in pre_paths])
+
+        assert asyncio.run(select_all()) == [{"step": [0, 1]}] * 3
+        assert len(self.server.requests) == 2
@@ -0,0 +1,99 @@
+import os
+
+import numpy as np
+
+from polytope_feature.datacube.backends.extract_cache import ExtractCache
+from polytope_feature.datacube.backends.extract_coalescer import extract_key
+
+
+class Result:
+    def __init__(self, values):
+        self.values = values
+
+
+class CountingExtract:
+    def __init__(self, missing_steps=()):
+        self.extracted = []
+        self.missing_steps = missing_steps
+
+    def __call__(self, gj_requests, context=None):
+        self.extracted.extend(request["step"] for request, _, _ in gj_requests)
+        results = []
+        for request, ranges, _ in gj_requests:
+            if request["step"] in self.missing_steps:
+                results.append(Result([]))
+            else:
+                results.append(Result([np.arange(start, end) + int(request["step"]) * 100.0 for start, end in ranges]))
+        return iter(results)
+
+
+def gj_request(step, ranges=((0, 3), (10, 12))):
+    return ({"param": "167", "step": step}, ranges, "md5")
+
+
+def flat_values(result):
+    return np.concatenate(result.values).tolist()
+
+
+class TestExtractCache:
+    def test_memory_cache(self):
+        # each request extracts 5 values, ie 40 bytes, so only two requests fit in the cache
+        cache = ExtractCache(max_bytes=80)
+        extract = CountingExtract(missing_steps=("3",))
+        cache.extract(extract, [gj_request("0"), gj_request("1"), gj_request("3")])
+        assert extract.extracted == ["0", "1", "3"]
+        assert len(cache) == 2
+        assert cache.num_bytes == 80
+
+        results = cache.extract(extract, [gj_request("1"), gj_request("0"), gj_request("3")])
+        assert extract.extracted == ["0", "1", "3", "3"]
+        assert [len(values) for values in results[0].values] == [3, 2]
+        assert flat_values(results[0]) == [100.0, 101.0, 102.0, 110.0, 111.0]
+        assert flat_values(results[1]) == [0.0, 1.0, 2.0, 10.0, 11.0]
+
+        # step 1 is now the least recently used request
+        cache.extract(extract, [gj_request("2")])
+        cache.extract(extract, [gj_request("0"), gj_request("1")])
+        assert extract.extracted == ["0", "1", "3", "3", "2", "1"]
+
+    def test_disk_cache(self, tmp_path):
+        cache = ExtractCache(max_bytes=40, cache_dir=str(tmp_path), max_disk_bytes=10000)
+        extract = CountingExtract()
+        cache.extract(extract, [gj_request("0"), gj_request("1"), gj_request("2")])
+        assert len(cache) == 1
+        assert len(os.listdir(tmp_path)) == 2
+
+        results = cache.extract(extract, [gj_request("0"), gj_request("1")])
+        assert extract.extracted == ["0", "1", "2"]
+        assert flat_values(results[0]) == [0.0, 1.0, 2.0, 10.0, 11.0]
+        assert isinstance(results[1].values[0], np.memmap)
+
+        # a new cache on the same directory finds the values there
+        new_cache = ExtractCache(max_bytes=0, cache_dir=str(tmp_path))
+        results = new_cache.extract(extract, [gj_request("1")])
+        assert extract.extracted == ["0", "1", "2"]
+        assert flat_values(results[0]) == [100.0, 101.0, 102.0, 110.0, 111.0]
+
+    def test_shared_disk_cache(self, tmp_path):
+        def set_last_use(cache, step, time):
+            os.utime(cache._disk_path(extract_key(gj_request(step))), (time, time))
+
+        extract = CountingExtract()
+        # the directory has room for the values of two requests
+        ExtractCache(max_bytes=0, cache_dir=str(tmp_path)).extract(extract, [gj_request("0")])
+        file_bytes = os.path.getsize(tmp_path / os.listdir(tmp_path)[0])
+        first = ExtractCache(max_bytes=0, cache_dir=str(tmp_path), max_disk_bytes=2 * file_bytes)
+        second = ExtractCache(max_bytes=0, cache_dir=str(tmp_path), max_disk_bytes=2 * file_bytes)
+        second.extract(extract, [gj_request("1")])
+        set_last_use(second, "0", 1000)
+        set_last_use(second, "1", 2000)
+
+        # the files written by the other cache are counted, and the least recently used one is removed
+        first.extract(extract, [gj_request("2")])
+        assert len(os.listdir(tmp_path)) == 2
+        second.extract(extract, [gj_request("0"), gj_request("1")])
+        assert extract.extracted == ["0", "1", "2", "0"]
+
+        # a cache with a smaller limit evicts the files already in the directory
+        ExtractCache(max_bytes=0, cache_dir=str(tmp_path), max_disk_bytes=file_bytes)
+        assert len(os.listdir(tmp_path)) == 1
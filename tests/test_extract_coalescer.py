@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from polytope_feature.datacube.backends.extract_coalescer import ExtractCoalescer
+
+
+class SlowExtract:
+    def __init__(self):
+        self.extracted = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, gj_requests, context=None):
+        self.extracted.append([request["step"] for request, _, _ in gj_requests])
+        self.started.set()
+        self.release.wait(10)
+        return iter([(request["step"], ranges) for request, ranges, _ in gj_requests])
+
+
+def gj_request(step, ranges=((0, 3),)):
+    return ({"param": "167", "step": step}, ranges, "md5")
+
+
+class TestExtractCoalescer:
+    def setup_method(self, method):
+        self.coalescer = ExtractCoalescer()
+
+    def run_in_thread(self, extract, gj_requests, outputs):
+        def target():
+            outputs.append(self.coalescer.extract(extract, gj_requests))
+
+        thread = threading.Thread(target=target)
+        thread.start()
+        return thread
+
+    def test_identical_requests_are_extracted_once(self):
+        first_extract = SlowExtract()
+        second_extract = SlowExtract()
+        first_outputs = []
+        second_outputs = []
+        first = self.run_in_thread(first_extract, [gj_request("0"), gj_request("1")], first_outputs)
+        assert first_extract.started.wait(10)
+        second = self.run_in_thread(
+            second_extract, [gj_request("1"), gj_request("2"), gj_request("2", ((4, 5),))], second_outputs
+        )
+        assert second_extract.started.wait(10)
+        second_extract.release.set()
+        first_extract.release.set()
+        first.join(10)
+        second.join(10)
+
+        assert first_extract.extracted == [["0", "1"]]
+        assert second_extract.extracted == [["2", "2"]]
+        assert first_outputs == [[("0", ((0, 3),)), ("1", ((0, 3),))]]
+        assert second_outputs == [[("1", ((0, 3),)), ("2", ((0, 3),)), ("2", ((4, 5),))]]
+        assert len(self.coalescer) == 0
+
+    def test_errors_are_shared(self):
+        def failing_extract(gj_requests, context=None):
+            raise ValueError("Missing JumpInfo")
+
+        with pytest.raises(ValueError):
+            self.coalescer.extract(failing_extract, [gj_request("0")])
+        assert len(self.coalescer) == 0
+
+        # once the failed extraction is done, the request can be extracted again
+        extract = SlowExtract()
+        extract.release.set()
+        assert self.coalescer.extract(extract, [gj_request("0")]) == [("0", ((0, 3),))]
+
+    def test_missing_results_are_errors(self):
+        first_extract = SlowExtract()
+        second_extract = SlowExtract()
+
+        def short_extract(gj_requests, context=None):
+            return list(first_extract(gj_requests, context))[:1]
+
+        first_errors = []
+        second_errors = []
+
+        def run_failing_in_thread(extract, gj_requests, errors):
+            def target():
+                try:
+                    self.coalescer.extract(extract, gj_requests)
+                except ValueError as e:
+                    errors.append(e)
+
+            thread = threading.Thread(target=target)
+            thread.start()
+            return thread
+
+        first = run_failing_in_thread(short_extract, [gj_request("0"), gj_request("1")], first_errors)
+        assert first_extract.started.wait(10)
+        second = run_failing_in_thread(second_extract, [gj_request("1"), gj_request("2")], second_errors)
+        assert second_extract.started.wait(10)
+        second_extract.release.set()
+        first_extract.release.set()
+        first.join(10)
+        second.join(10)
+
+        # the datacube waiting for the missing result gets the error instead of None
+        assert len(first_errors) == 1
+        assert second_errors == first_errors
+        assert len(self.coalescer) == 0
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from polytope_feature.datacube.backends.fdb import FDBDatacube
+
+
+class TestFDBRangeCoalescing:
+    def setup_method(self, method):
+        self.ranges = ((0, 3), (3, 5), (7, 9), (20, 21))
+        self.output = np.concatenate([np.arange(start, end) for start, end in self.ranges])
+
+    def coalesce(self, range_gap_tolerance):
+        datacube = SimpleNamespace(range_gap_tolerance=range_gap_tolerance)
+        return FDBDatacube.coalesce_fdb_request_ranges(datacube, self.ranges)
+
+    def test_touching_ranges(self):
+        ranges, value_sources = self.coalesce(0)
+        assert ranges == ((0, 5), (7, 9), (20, 21))
+        assert value_sources is None
+
+    def test_small_gaps(self):
+        ranges, value_sources = self.coalesce(2)
+        assert ranges == ((0, 9), (20, 21))
+        fetched = np.concatenate([np.arange(start, end) for start, end in ranges])
+        assert np.array_equal(fetched[value_sources], self.output)
+
+    def test_all_gaps(self):
+        ranges, value_sources = self.coalesce(100)
+        assert ranges == ((0, 21),)
+        assert np.array_equal(np.arange(0, 21)[value_sources], self.output)
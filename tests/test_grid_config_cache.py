@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+pytest.importorskip("eccodes")
+
+from polytope_feature.datacube import switching_grid_helper  # noqa: E402
+
+
+class TestGridConfigCache:
+    @pytest.fixture(autouse=True)
+    def grid_cache(self, tmp_path, monkeypatch):
+        self.cache_file = tmp_path / "grid_cache.json"
+        self.fetched = []
+        monkeypatch.setattr(switching_grid_helper, "GRID_CACHE_FILE", str(self.cache_file))
+        monkeypatch.setattr(switching_grid_helper, "_grid_cache", {})
+
+        def get_first_grib_message(req):
+            self.fetched.append(req["georef"])
+            return req["georef"]
+
+        monkeypatch.setattr(switching_grid_helper, "get_first_grib_message", get_first_grib_message)
+        monkeypatch.setattr(
+            switching_grid_helper,
+            "get_gridspec_and_hash",
+            lambda gid: ({"type": "lambert_conformal", "nx": len(gid)}, f"md5-{gid}"),
+        )
+        monkeypatch.setattr(switching_grid_helper.eccodes, "codes_release", lambda gid: None)
+
+    def test_grib_message_is_fetched_once(self):
+        req = {"georef": "u09tvk", "class": "d1"}
+        expected = ({"type": "lambert_conformal", "nx": 6}, "md5-u09tvk")
+        assert switching_grid_helper.lookup_grid_config(req) == expected
+        assert switching_grid_helper.lookup_grid_config(req) == expected
+        assert self.fetched == ["u09tvk"]
+        assert json.loads(self.cache_file.read_text()) == {
+            '"u09tvk"': {"gridspec": {"type": "lambert_conformal", "nx": 6}, "md5hash": "md5-u09tvk"}
+        }
+
+    def test_disk_cache(self, monkeypatch):
+        self.cache_file.write_text(
+            json.dumps({'"u0"': {"gridspec": {"type": "lambert_conformal"}, "md5hash": "from-disk"}})
+        )
+        assert switching_grid_helper.lookup_grid_config({"georef": "u0"}) == (
+            {"type": "lambert_conformal"},
+            "from-disk",
+        )
+        assert self.fetched == []
+
+        # once loaded, the file is not read again
+        self.cache_file.unlink()
+        monkeypatch.setattr(switching_grid_helper, "_load_cache", lambda: pytest.fail("the cache file was read"))
+        assert switching_grid_helper.lookup_grid_config({"georef": "u0"})[1] == "from-disk"
+
+    def test_new_georefs_are_added_to_the_file(self):
+        switching_grid_helper.lookup_grid_config({"georef": "a"})
+        # another process wrote its own georef in the meantime
+        cache = json.loads(self.cache_file.read_text())
+        cache['"b"'] = {"gridspec": {}, "md5hash": "md5-b"}
+        self.cache_file.write_text(json.dumps(cache))
+        switching_grid_helper.lookup_grid_config({"georef": "c"})
+        assert sorted(json.loads(self.cache_file.read_text())) == ['"a"', '"b"', '"c"']
+        assert self.fetched == ["a", "c"]
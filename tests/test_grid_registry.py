@@ -0,0 +1,83 @@
+from copy import deepcopy
+
+from polytope_feature.datacube.grid_registry import (
+    GridRegistry,
+    grid_key,
+    grid_registry,
+)
+from polytope_feature.datacube.transformations.datacube_mappers.datacube_mappers import (
+    DatacubeMapper,
+)
+from polytope_feature.engine.quadtree_slicer import QuadTreeSlicer
+from polytope_feature.options import MapperConfig
+
+
+class TestGridRegistry:
+    def setup_method(self, method):
+        grid_registry.clear()
+        self.octahedral_options = MapperConfig(
+            name="mapper", type="octahedral", resolution=1280, axes=["latitude", "longitude"]
+        )
+        self.points = [(0.0, 0.0), (0.0, 10.0), (10.0, 0.0), (10.0, 10.0), (5.0, 5.0)]
+        self.unstructured_options = MapperConfig(
+            name="mapper", type="unstructured", resolution=0, axes=["latitude", "longitude"], points=self.points
+        )
+
+    def test_mapper_tables_are_shared(self):
+        mapper1 = DatacubeMapper("values", self.octahedral_options)
+        mapper2 = DatacubeMapper("values", deepcopy(self.octahedral_options))
+        assert mapper1.grid_key == mapper2.grid_key
+        assert mapper1._final_transformation is mapper2._final_transformation
+        assert deepcopy(mapper1)._final_transformation is mapper1._final_transformation
+
+    def test_different_grids_are_not_shared(self):
+        other_options = MapperConfig(name="mapper", type="octahedral", resolution=640, axes=["latitude", "longitude"])
+        mapper1 = DatacubeMapper("values", self.octahedral_options)
+        mapper2 = DatacubeMapper("values", other_options)
+        assert mapper1.grid_key != mapper2.grid_key
+        assert mapper1._final_transformation is not mapper2._final_transformation
+        assert len(mapper2.first_axis_vals()) == 640 * 2
+
+    def test_point_cloud_is_shared(self):
+        mapper1 = DatacubeMapper("values", self.unstructured_options)
+        mapper2 = DatacubeMapper("values", self.unstructured_options)
+        assert mapper1.grid_latlon_points() is mapper2.grid_latlon_points()
+        assert ("point_cloud", mapper1.grid_key) in grid_registry
+        # copies of the points are only known to be the same grid through an identifier
+        assert DatacubeMapper("values", deepcopy(self.unstructured_options)).grid_key != mapper1.grid_key
+        options = self.unstructured_options.model_copy(update={"md5_hash": "f1a7"})
+        mapper3 = DatacubeMapper("values", options)
+        mapper4 = DatacubeMapper("values", deepcopy(options))
+        assert mapper3.grid_key == mapper4.grid_key
+        assert mapper3.grid_latlon_points() is mapper4.grid_latlon_points()
+
+    def test_point_cloud_is_part_of_key(self):
+        other_options = MapperConfig(
+            name="mapper", type="unstructured", resolution=0, axes=["latitude", "longitude"], points=self.points[:-1]
+        )
+        assert grid_key("values", self.unstructured_options) != grid_key("values", other_options)
+        uuid_options = [
+            MapperConfig(name="mapper", type="unstructured", axes=["latitude", "longitude"], points=points, uuid=uuid)
+            for points, uuid in [(self.points, "a"), (self.points, "b")]
+        ]
+        assert grid_key("values", uuid_options[0]) != grid_key("values", uuid_options[1])
+
+    def test_registry_is_bounded(self):
+        registry = GridRegistry(max_entries=2)
+        registry.get_or_create("mapper", 1, lambda: "grid 1")
+        registry.get_or_create("mapper", 2, lambda: "grid 2")
+        # the first grid is used again, so the second one is dropped for the third one
+        assert registry.get_or_create("mapper", 1, lambda: "new grid 1") == "grid 1"
+        registry.get_or_create("mapper", 3, lambda: "grid 3")
+        assert len(registry) == 2
+        assert ("mapper", 2) not in registry
+        assert registry.get("mapper", 1) == "grid 1"
+        registry.clear()
+        assert len(registry) == 0
+
+    def test_quadtree_is_shared(self):
+        key = grid_key("values", self.unstructured_options)
+        slicer1 = QuadTreeSlicer(self.points, key)
+        slicer2 = QuadTreeSlicer(self.points, key)
+        assert slicer1.quad_tree is slicer2.quad_tree
+        assert QuadTreeSlicer(self.points).quad_tree is not slicer1.quad_tree
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+
+from polytope_feature.datacube.backends.local_gribjump import LocalGribJump
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Point, Select
+
+# Number of points of the octahedral O1280 grid
+GRID_SIZE = 6599680
+
+
+class TestLocalGribJump:
+    def setup_method(self, method):
+        self.archive_axes = {
+            "class": ["od"],
+            "expver": ["0001"],
+            "levtype": ["sfc"],
+            "stream": ["oper"],
+            "type": ["fc"],
+            "domain": ["g"],
+            "date": ["20240103"],
+            "time": ["0000", "1200"],
+            "param": ["167", "168"],
+            "step": ["0", "1", "2"],
+        }
+        self.options = {
+            "axis_config": [
+                {"axis_name": "step", "transformations": [{"name": "type_change", "type": "int"}]},
+                {
+                    "axis_name": "date",
+                    "transformations": [{"name": "merge", "other_axis": "time", "linkers": ["T", "00"]}],
+                },
+                {
+                    "axis_name": "values",
+                    "transformations": [
+                        {"name": "mapper", "type": "octahedral", "resolution": 1280, "axes": ["latitude", "longitude"]}
+                    ],
+                },
+                {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+                {"axis_name": "longitude", "transformations": [{"name": "cyclic", "range": [0, 360]}]},
+            ],
+            "pre_path": {"class": "od", "expver": "0001", "levtype": "sfc", "stream": "oper", "type": "fc"},
+            "compressed_axes_config": [
+                "longitude",
+                "latitude",
+                "levtype",
+                "step",
+                "date",
+                "domain",
+                "expver",
+                "param",
+                "class",
+                "stream",
+                "type",
+            ],
+        }
+
+    def request(self, shape, steps=(0, 1)):
+        return Request(
+            Select("step", list(steps)),
+            Select("levtype", ["sfc"]),
+            Select("date", [pd.Timestamp("20240103T0000"), pd.Timestamp("20240103T1200")]),
+            Select("domain", ["g"]),
+            Select("expver", ["0001"]),
+            Select("param", ["167"]),
+            Select("class", ["od"]),
+            Select("stream", ["oper"]),
+            Select("type", ["fc"]),
+            shape,
+        )
+
+    def retrieve(self, gj, request, **options):
+        API = Polytope(datacube=gj, options={**self.options, **options})
+        return API.retrieve(request), API.datacube
+
+    def test_box(self):
+        gj = LocalGribJump(self.archive_axes, GRID_SIZE)
+        result, datacube = self.retrieve(gj, self.request(Box(["latitude", "longitude"], [0, -0.2], [0.2, 0.2])))
+        # 2 dates and 3 latitudes
+        assert len(result.leaves) == 6
+        assert gj.num_extract_calls == 1
+        mapper = datacube.grid_transformation
+        for leaf, path in result.iter_leaves():
+            values = np.asarray(leaf.result).reshape(-1, len(leaf.values))
+            # 2 steps
+            assert values.shape[0] == 2
+            grid_idxs = values % GRID_SIZE
+            assert np.all(grid_idxs == mapper.unmap(path[-2].values, leaf.values))
+            field_idxs = values[:, 0] // GRID_SIZE
+            assert (field_idxs % 3).tolist() == [0, 1]
+
+    def test_missing_fields(self):
+        gj = LocalGribJump(self.archive_axes, GRID_SIZE, missing_fields=[{"time": "1200", "step": "1"}])
+        result, _ = self.retrieve(gj, self.request(Box(["latitude", "longitude"], [0, 0], [0.2, 0.2])))
+        for leaf, path in result.iter_leaves():
+            values = np.asarray(leaf.result).reshape(-1, len(leaf.values))
+            date = [node.values for node in path if node.axis.name == "date"][0]
+            if date == (pd.Timestamp("20240103T1200"),):
+                assert not np.isnan(values[0]).any()
+                assert np.isnan(values[1]).all()
+            else:
+                assert not np.isnan(values).any()
+
+    def test_extraction_options(self):
+        request = self.request(Box(["latitude", "longitude"], [-1, 355], [1, 365]), steps=(0, 1, 2))
+        expected, _ = self.retrieve(LocalGribJump(self.archive_axes, GRID_SIZE), request)
+        gj = LocalGribJump(self.archive_axes, GRID_SIZE)
+        result, _ = self.retrieve(
+            gj,
+            request,
+            range_gap_tolerance=1000,
+            extract_chunk_size=2,
+            extract_max_workers=3,
+            coalesce_extracts=True,
+        )
+        assert gj.num_extract_calls == 3
+        assert len(result.leaves) == len(expected.leaves)
+        for leaf, expected_leaf in zip(result.leaves, expected.leaves):
+            assert leaf.flatten() == expected_leaf.flatten()
+            assert np.array_equal(leaf.result, expected_leaf.result)
+
+    def test_memmap_fields(self, tmp_path):
+        archive_axes = {**self.archive_axes, "time": ["0000"], "param": ["167"], "step": ["0"]}
+        data = np.memmap(tmp_path / "fields.bin", dtype="<f4", mode="w+", shape=(1, GRID_SIZE))
+        data[0] = np.arange(GRID_SIZE) * 0.5
+        data.flush()
+        gj = LocalGribJump.open_memmap(tmp_path / "fields.bin", archive_axes, GRID_SIZE, dtype="<f4")
+        request = self.request(Point(["latitude", "longitude"], [[0.04, 0.04]], method="nearest"), steps=(0,))
+        result, datacube = self.retrieve(gj, request)
+        assert len(result.leaves) == 1
+        leaf = result.leaves[0]
+        grid_idx = datacube.grid_transformation.unmap(leaf.parent.values, leaf.values)[0]
+        assert list(leaf.result) == [grid_idx * 0.5]
@@ -0,0 +1,23 @@
+import numpy as np
+
+from polytope_feature.utility.geometry import nearest_pt, nearest_pt_indexes
+
+
+class TestNearestPtIndexes:
+    def setup_method(self, method):
+        rng = np.random.default_rng(0)
+        # points on a coarse grid, so that many requested points are at the same distance of several candidates
+        self.candidates = [(float(lat), float(lon)) for lat, lon in rng.integers(-10, 10, (500, 2))]
+        self.pts = [(float(lat), float(lon)) for lat, lon in rng.integers(-12, 12, (200, 2)) + 0.5]
+
+    def test_matches_nearest_pt(self):
+        pts_list = [[(lat,), (lon,)] for lat, lon in self.candidates]
+        for k in [1, 4]:
+            idxs = nearest_pt_indexes(self.candidates, self.pts, k)
+            assert idxs.shape == (len(self.pts), k)
+            for pt, pt_idxs in zip(self.pts, idxs):
+                assert [self.candidates[i] for i in pt_idxs] == nearest_pt(pts_list, pt, k)
+
+    def test_no_candidates(self):
+        assert nearest_pt_indexes([], self.pts, 1).shape == (len(self.pts), 0)
+        assert nearest_pt_indexes(self.candidates[:2], self.pts, 5).shape == (len(self.pts), 2)
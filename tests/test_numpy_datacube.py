@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from polytope_feature.datacube.backends.numpy import NumpyArray
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Point, Select, Span
+
+
+class TestNumpyDatacube:
+    def setup_method(self, method):
+        self.values = np.random.randn(3, 4, 19, 36)
+        self.coords = {
+            "date": pd.date_range("2000-01-01", "2000-01-03", 3).to_numpy(),
+            "step": np.array([0, 3, 6, 9]),
+            "latitude": np.linspace(90, -90, 19),
+            "longitude": np.arange(0, 360, 10.0),
+        }
+        self.options = {
+            "axis_config": [
+                {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+                {"axis_name": "longitude", "transformations": [{"name": "cyclic", "range": [0, 360]}]},
+            ],
+            "compressed_axes_config": ["date", "step", "latitude", "longitude"],
+        }
+        self.API = Polytope(datacube=NumpyArray(self.values, self.coords, name="2t"), options=self.options)
+
+    def test_same_results_as_xarray(self):
+        xarray_API = Polytope(
+            datacube=xr.DataArray(self.values, dims=tuple(self.coords), coords=self.coords, name="2t"),
+            options=self.options,
+        )
+        for request in [
+            Request(
+                Select("date", [pd.Timestamp("2000-01-02")]),
+                Span("step", 0, 6),
+                Box(["latitude", "longitude"], [-25, -35], [45, 25]),
+            ),
+            Request(
+                Select("date", [pd.Timestamp("2000-01-01"), pd.Timestamp("2000-01-03")]),
+                Select("step", [9]),
+                Point(["latitude", "longitude"], [[11, 184]], method="nearest"),
+            ),
+        ]:
+            result = self.API.retrieve(request)
+            expected = xarray_API.retrieve(request)
+            assert len(result.leaves) == len(expected.leaves)
+            for leaf, expected_leaf in zip(result.leaves, expected.leaves):
+                assert leaf.flatten() == expected_leaf.flatten()
+                assert leaf.result[0] == expected_leaf.result[0]
+                assert leaf.result[1].shape == expected_leaf.result[1].shape
+                assert np.array_equal(leaf.result[1], expected_leaf.result[1])
+
+    def test_memmap(self, tmp_path):
+        data = np.memmap(tmp_path / "values.bin", dtype="<f4", mode="w+", shape=(3, 4, 19, 36))
+        data[:] = np.arange(data.size).reshape(data.shape)
+        data.flush()
+        values = np.memmap(tmp_path / "values.bin", dtype="<f4", mode="r", shape=(3, 4, 19, 36))
+        API = Polytope(datacube=NumpyArray(values, self.coords), options=self.options)
+        request = Request(
+            Select("date", [pd.Timestamp("2000-01-03")]),
+            Select("step", [3]),
+            Box(["latitude", "longitude"], [0, 0], [10, 20]),
+        )
+        result = API.retrieve(request)
+        assert len(result.leaves) == 1
+        assert result.leaves[0].result[0] is None
+        # 2 latitudes and 3 longitudes
+        assert result.leaves[0].result[1].ravel().tolist() == [
+            data[2, 1, lat, lon] for lat in [9, 8] for lon in [0, 1, 2]
+        ]
+
+    def test_missing_label(self):
+        datacube = self.API.datacube
+        with pytest.raises(KeyError):
+            datacube.find_positions("step", [7])
+        # the labels are only matched to the nearest value on the axes of shapes looking for the nearest points
+        datacube.nearest_search[("step",)] = ([[7]], 1)
+        assert datacube.find_positions("step", [7]).tolist() == [2]
+
+    def test_mismatched_coordinates(self):
+        with pytest.raises(ValueError):
+            NumpyArray(self.values, {**self.coords, "step": np.array([0, 3, 6])})
+
+
+class TestNumpyDatacubeTransformations:
+    def test_merge(self):
+        array = NumpyArray(np.array([[1.0, 2.0]]), {"date": ["20000101"], "time": ["0000", "0600"]})
+        options = {
+            "axis_config": [
+                {
+                    "axis_name": "date",
+                    "transformations": [{"name": "merge", "other_axis": "time", "linkers": ["T", "00"]}],
+                }
+            ],
+            "compressed_axes_config": ["date", "time"],
+        }
+        API = Polytope(datacube=array, options=options)
+        result = API.retrieve(Request(Select("date", [pd.Timestamp("20000101T060000")])))
+        assert result.leaves[0].flatten()["date"] == (np.datetime64("2000-01-01T06:00:00"),)
+        assert result.leaves[0].result[1].tolist() == [[2.0]]
+
+    def test_octahedral_mapper(self):
+        grid_size = 5248
+        array = NumpyArray(
+            np.arange(2 * grid_size, dtype=np.float64).reshape(2, grid_size),
+            {"step": [0, 1], "values": np.arange(grid_size)},
+        )
+        options = {
+            "axis_config": [
+                {
+                    "axis_name": "values",
+                    "transformations": [
+                        {"name": "mapper", "type": "octahedral", "resolution": 32, "axes": ["latitude", "longitude"]}
+                    ],
+                },
+                {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+            ],
+            "compressed_axes_config": ["longitude", "latitude", "step"],
+        }
+        API = Polytope(datacube=array, options=options)
+        result = API.retrieve(Request(Select("step", [0, 1]), Box(["latitude", "longitude"], [0, 0], [10, 10])))
+        assert len(result.leaves) == 4
+        mapper = API.datacube.grid_transformation
+        for leaf, path in result.iter_leaves():
+            grid_idxs = mapper.unmap(path[-2].values, leaf.values)
+            assert np.array_equal(leaf.result[1], [grid_idxs, np.asarray(grid_idxs) + grid_size])
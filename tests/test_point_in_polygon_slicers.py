@@ -0,0 +1,41 @@
+import numpy as np
+from shapely.geometry import Point
+from shapely.geometry.polygon import Polygon
+
+from polytope_feature.engine.optimised_point_in_polygon_slicer import (
+    OptimisedPointInPolygonSlicer,
+)
+from polytope_feature.engine.point_in_polygon_slicer import PointInPolygonSlicer
+from polytope_feature.shapes import ConvexPolytope
+
+
+class TestPointInPolygonSlicers:
+    def setup_method(self, method):
+        rng = np.random.default_rng(1)
+        lats = np.round(rng.uniform(-90, 90, 5000), 1)
+        lons = np.round(rng.uniform(0, 360, 5000), 1)
+        # add points on the polygon boundaries, which should never be contained
+        self.points = [(float(lat), float(lon)) for lat, lon in zip(lats, lons)] + [(30.0, 50.0), (20.0, 20.0)]
+        self.polytopes = [
+            ConvexPolytope(["latitude", "longitude"], [[-10, 20], [30, 20], [30, 80], [-10, 80]]),
+            ConvexPolytope(["latitude", "longitude"], [[0, 0], [40, 40], [-40, 100]]),
+        ]
+
+    def expected_points(self, polytope):
+        polygon = Polygon(polytope.points)
+        return [point for point in self.points if polygon.contains(Point(point[0], point[1]))]
+
+    def test_point_in_polygon(self):
+        slicer = PointInPolygonSlicer(self.points)
+        for polytope in self.polytopes:
+            found_points = slicer.extract_single(None, polytope)
+            assert sorted(found_points) == sorted(self.expected_points(polytope))
+            assert (30.0, 50.0) not in found_points
+            assert (20.0, 20.0) not in found_points
+
+    def test_optimised_point_in_polygon(self):
+        slicer = OptimisedPointInPolygonSlicer(self.points)
+        for polytope in self.polytopes:
+            found_points = slicer.extract_single(None, polytope)
+            assert sorted(found_points) == sorted(self.expected_points(polytope))
+            assert all(slicer.points[slicer.find_point_index(point)] == point for point in found_points)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+from polytope_feature.engine.hullslicer import HullSlicer
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Select, Union
+
+
+class TestPrefixSharing:
+    def setup_method(self, method):
+        self.array = xr.DataArray(
+            np.random.randn(5, 4, 19, 36),
+            dims=("date", "step", "latitude", "longitude"),
+            coords={
+                "date": pd.date_range("2000-01-01", "2000-01-05", 5),
+                "step": [0, 3, 6, 9],
+                "latitude": np.arange(-90, 91, 10, dtype=float),
+                "longitude": np.arange(0, 360, 10, dtype=float),
+            },
+        )
+        self.request = Request(
+            Select("date", ["2000-01-01", "2000-01-03"]),
+            Select("step", [0, 6, 9]),
+            Union(
+                ["latitude", "longitude"],
+                Box(["latitude", "longitude"], [0, 0], [20, 30]),
+                Box(["latitude", "longitude"], [10, 20], [40, 50]),
+                Box(["latitude", "longitude"], [-30, 100], [-10, 100]),
+            ),
+        )
+
+    def retrieve(self, monkeypatch, share_prefix, share_branches=False):
+        num_calls = {"build_branch": 0, "nodes": 0, "merge": 0}
+        build_branch = HullSlicer._build_branch
+        init = TensorIndexTree.__init__
+        merge = TensorIndexTree.merge
+
+        def counted_build_branch(self, *args):
+            num_calls["build_branch"] += 1
+            return build_branch(self, *args)
+
+        def counted_init(self, *args):
+            num_calls["nodes"] += 1
+            return init(self, *args)
+
+        def counted_merge(self, other):
+            num_calls["merge"] += 1
+            return merge(self, other)
+
+        monkeypatch.setattr(HullSlicer, "_build_branch", counted_build_branch)
+        monkeypatch.setattr(TensorIndexTree, "__init__", counted_init)
+        monkeypatch.setattr(TensorIndexTree, "merge", counted_merge)
+        if not share_branches:
+            monkeypatch.setattr(Polytope, "_can_share_branches", lambda self, ax, datacube: False)
+        if not share_prefix:
+            monkeypatch.setattr(Polytope, "_divergence_layer", lambda self, c, other_c, first_layers: 0)
+        API = Polytope(datacube=self.array, options={"compressed_axes_config": []})
+        result = API.retrieve(self.request)
+        monkeypatch.undo()
+        return result, num_calls
+
+    def test_prefix_sharing_gives_same_tree(self, monkeypatch):
+        result, num_calls = self.retrieve(monkeypatch, True)
+        expected_result, expected_num_calls = self.retrieve(monkeypatch, False)
+        assert len(result.leaves) == len(expected_result.leaves)
+        for leaf, expected_leaf in zip(result.leaves, expected_result.leaves):
+            assert leaf.flatten() == expected_leaf.flatten()
+            assert np.array_equal(leaf.result[1], expected_leaf.result[1])
+        # the date and step layers are only built for the first box of the union
+        date_step_calls = 1 + 2
+        assert expected_num_calls["build_branch"] - num_calls["build_branch"] == 2 * date_step_calls
+        # the boxes are sliced into the same tree, which is neither copied nor merged
+        date_step_nodes = 2 + 2 * 3
+        assert expected_num_calls["nodes"] - num_calls["nodes"] == 2 * date_step_nodes
+        assert num_calls["merge"] == expected_num_calls["merge"] == 0
+
+    def test_prefix_and_branch_sharing(self, monkeypatch):
+        result, _ = self.retrieve(monkeypatch, True, True)
+        expected_result, _ = self.retrieve(monkeypatch, False, False)
+        assert len(result.leaves) == len(expected_result.leaves) == 2 * 3 * 27
+        for leaf, expected_leaf in zip(result.leaves, expected_result.leaves):
+            assert leaf.flatten() == expected_leaf.flatten()
+            assert np.array_equal(leaf.result[1], expected_leaf.result[1])
+
+    def test_removed_branches_are_restored(self, monkeypatch):
+        # the first box of the union has no data, so its combination removes the date and step branches
+        self.request = Request(
+            Select("date", ["2000-01-01", "2000-01-03"]),
+            Select("step", [0, 6, 9]),
+            Union(
+                ["latitude", "longitude"],
+                Box(["latitude", "longitude"], [1, 1], [2, 2]),
+                Box(["latitude", "longitude"], [10, 20], [40, 50]),
+            ),
+        )
+        result, _ = self.retrieve(monkeypatch, True)
+        expected_result, _ = self.retrieve(monkeypatch, False)
+        assert len(result.leaves) == len(expected_result.leaves) == 2 * 3 * 4 * 4
+        for leaf, expected_leaf in zip(result.leaves, expected_result.leaves):
+            assert leaf.flatten() == expected_leaf.flatten()
+            assert np.array_equal(leaf.result[1], expected_leaf.result[1])
@@ -243,6 +243,70 @@ class TestIndexTree:
         child2 = axis1
         assert not child1 == child2
 
+    def test_compact_nodes(self):
+        axis1 = IntDatacubeAxis()
+        axis1.name = "child1"
+        child1 = TensorIndexTree(axis=axis1, values=(1,))
+        root_node = TensorIndexTree()
+        assert not hasattr(child1, "__dict__")
+        assert len(child1.children) == 0
+        assert child1.find_child(root_node) is None
+        root_node.add_child(child1)
+        assert root_node.children == SortedList([child1])
+        child1["unsliced_polytopes"] = set()
+        assert child1["unsliced_polytopes"] == set()
+        del child1["unsliced_polytopes"]
+        assert not hasattr(child1, "unsliced_polytopes")
+        child1.result.extend([1.0, 2.0])
+        assert child1.result == [1.0, 2.0]
+
+    def test_iter_leaves(self):
+        axis1 = IntDatacubeAxis()
+        axis2 = IntDatacubeAxis()
+        axis1.name = "child"
+        axis2.name = "grandchild"
+        root_node = TensorIndexTree()
+        for i in range(3):
+            child = TensorIndexTree(axis=axis1, values=(i,))
+            root_node.add_child(child)
+            for j in range(2):
+                child.add_child(TensorIndexTree(axis=axis2, values=(j,)))
+        leaves = root_node.leaves
+        assert len(leaves) == 6
+        leaves_with_paths = list(root_node.iter_leaves())
+        assert [leaf for leaf, _ in leaves_with_paths] == leaves
+        for leaf, path in leaves_with_paths:
+            assert list(path) == leaf.get_ancestors()
+        assert [[node.values for node in path] for _, path in leaves_with_paths][:2] == [[(0,), (0,)], [(0,), (1,)]]
+        # iterating the leaves again does not change the tree or the paths
+        assert root_node.leaves == leaves
+        assert list(root_node.iter_leaves()) == leaves_with_paths
+        sub_leaves = list(root_node.children[1].iter_leaves())
+        assert [path for _, path in sub_leaves] == [path for _, path in leaves_with_paths[2:4]]
+
+    def test_cached_path(self):
+        axis1 = IntDatacubeAxis()
+        axis2 = IntDatacubeAxis()
+        axis1.name = "child"
+        axis2.name = "grandchild"
+        root_node = TensorIndexTree()
+        child = TensorIndexTree(axis=axis1, values=(1,))
+        grandchild = TensorIndexTree(axis=axis2, values=(2,))
+        root_node.add_child(child)
+        child.add_child(grandchild)
+        assert root_node.path == ()
+        assert grandchild.path == (("child", (1,)), ("grandchild", (2,)))
+        assert grandchild.path is grandchild.path
+        assert grandchild.path[:1] == child.path
+        assert grandchild.flatten() == {"child": (1,), "grandchild": (2,)}
+        # changing the values or the parent of a node updates the paths below it
+        child.add_value(3)
+        assert grandchild.path == (("child", (1, 3)), ("grandchild", (2,)))
+        other_child = TensorIndexTree(axis=axis1, values=(4,))
+        root_node.add_child(other_child)
+        grandchild.set_parent = other_child
+        assert grandchild.path == (("child", (4,)), ("grandchild", (2,)))
+
     # def test_to_dict(self):
     #     axis1 = IntDatacubeAxis()
     #     axis2 = IntDatacubeAxis()
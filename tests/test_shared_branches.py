@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from polytope_feature.engine.hullslicer import HullSlicer
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Select
+
+
+class TestSharedBranches:
+    def setup_method(self, method):
+        self.array = xr.DataArray(
+            np.random.randn(5, 4, 3, 19, 36),
+            dims=("date", "step", "number", "latitude", "longitude"),
+            coords={
+                "date": pd.date_range("2000-01-01", "2000-01-05", 5),
+                "step": [0, 3, 6, 9],
+                "number": [1, 2, 3],
+                "latitude": np.arange(-90, 91, 10, dtype=float),
+                "longitude": np.arange(0, 360, 10, dtype=float),
+            },
+        )
+        self.request = Request(
+            Select("date", ["2000-01-01", "2000-01-03", "2000-01-04"]),
+            Select("step", [0, 6, 9]),
+            Select("number", [1, 3]),
+            Box(["latitude", "longitude"], [0, 0], [20, 30]),
+        )
+
+    def retrieve(self, monkeypatch, share_branches):
+        num_calls = [0]
+        build_branch = HullSlicer._build_branch
+
+        def counted_build_branch(self, *args):
+            num_calls[0] += 1
+            return build_branch(self, *args)
+
+        monkeypatch.setattr(HullSlicer, "_build_branch", counted_build_branch)
+        if not share_branches:
+            monkeypatch.setattr(Polytope, "_can_share_branches", lambda self, ax, datacube: False)
+        API = Polytope(datacube=self.array, options={"compressed_axes_config": []})
+        result = API.retrieve(self.request)
+        monkeypatch.undo()
+        return result, num_calls[0]
+
+    def test_shared_branches_give_same_tree(self, monkeypatch):
+        result, num_calls = self.retrieve(monkeypatch, True)
+        expected_result, expected_num_calls = self.retrieve(monkeypatch, False)
+        assert len(result.leaves) == len(expected_result.leaves) == 3 * 3 * 2 * 3
+        for leaf, expected_leaf in zip(result.leaves, expected_result.leaves):
+            assert leaf.flatten() == expected_leaf.flatten()
+            assert np.array_equal(leaf.result[1], expected_leaf.result[1])
+        # only one date, step, number and latitude branch is sliced, as the longitudes do not depend on them here
+        assert num_calls == 5
+        assert expected_num_calls == 1 + 3 + 3 * 3 + 3 * 3 * 2 + 3 * 3 * 2 * 3
+
+    def test_empty_shared_branches_are_removed(self, monkeypatch):
+        self.request = Request(
+            Select("date", ["2000-01-01", "2000-01-03"]),
+            Select("step", [0, 6]),
+            Select("number", [1, 3]),
+            Box(["latitude", "longitude"], [1, 1], [2, 2]),
+        )
+        result, _ = self.retrieve(monkeypatch, True)
+        assert len(result.leaves) == 1
+        assert result.leaves[0].axis.name == "root"
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from polytope_feature.datacube.backends.numpy import NumpyArray
+from polytope_feature.datacube.datacube_axis import IntDatacubeAxis
+from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
+from polytope_feature.datacube.tree_export import tree_to_columns, tree_to_dataarray
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Select
+
+
+class TestTreeExport:
+    def setup_method(self, method):
+        self.array = xr.DataArray(
+            np.arange(6 * 3 * 129, dtype=np.float64).reshape(6, 3, 129),
+            dims=("date", "step", "level"),
+            coords={
+                "date": pd.date_range("2000-01-01", "2000-01-06", 6),
+                "step": [0, 3, 6],
+                "level": range(1, 130),
+            },
+        )
+        options = {"compressed_axes_config": ["date", "step", "level"]}
+        self.API = Polytope(datacube=self.array, options=options)
+
+    def test_columns(self):
+        request = Request(Box(["step", "level"], [0, 10], [3, 12]), Select("date", ["2000-01-01", "2000-01-03"]))
+        result = self.API.retrieve(request)
+        columns = tree_to_columns(result, self.API.datacube)
+        assert list(columns.keys()) == ["date", "step", "level", "values"]
+        assert len(columns["values"]) == 12
+        assert columns["date"].dtype == np.dtype("datetime64[ns]")
+        assert columns["step"].dtype == np.int64
+        for date, step, level, value in zip(columns["date"], columns["step"], columns["level"], columns["values"]):
+            assert self.array.sel(date=date, step=step, level=level).item() == value
+
+    def test_dataarray(self):
+        request = Request(Box(["step", "level"], [0, 10], [3, 12]), Select("date", ["2000-01-01", "2000-01-03"]))
+        result = self.API.retrieve(request)
+        data = tree_to_dataarray(result, self.API.datacube)
+        assert data.dims == ("date", "step", "level")
+        assert data.shape == (2, 2, 3)
+        expected = self.array.sel(date=["2000-01-01", "2000-01-03"], step=[0, 3], level=[10, 11, 12])
+        assert np.array_equal(data.values, expected.values)
+
+    def test_flat_results_with_missing_values(self):
+        step_axis = IntDatacubeAxis()
+        step_axis.name = "step"
+        lat_axis = IntDatacubeAxis()
+        lat_axis.name = "latitude"
+        lon_axis = IntDatacubeAxis()
+        lon_axis.name = "longitude"
+        root = TensorIndexTree()
+        step_node = TensorIndexTree(axis=step_axis, values=(0, 6))
+        root.add_child(step_node)
+        for lat, lons, result in [(10, (1, 2), [1.0, 2.0, None, 4.0]), (20, (3,), [5.0, 6.0])]:
+            lat_node = TensorIndexTree(axis=lat_axis, values=(lat,))
+            lon_node = TensorIndexTree(axis=lon_axis, values=lons)
+            step_node.add_child(lat_node)
+            lat_node.add_child(lon_node)
+            lon_node.result = result
+
+        columns = tree_to_columns(root)
+        assert columns["step"].tolist() == [0, 0, 6, 6, 0, 6]
+        assert columns["latitude"].tolist() == [10, 10, 10, 10, 20, 20]
+        assert columns["longitude"].tolist() == [1, 2, 1, 2, 3, 3]
+        assert np.isnan(columns["values"][2])
+
+        data = tree_to_dataarray(root)
+        assert data.dims == ("step", "point")
+        assert data["latitude"].values.tolist() == [10, 10, 20]
+        assert data["longitude"].values.tolist() == [1, 2, 3]
+        assert np.array_equal(data.values, [[1.0, 2.0, 5.0], [np.nan, 4.0, 6.0]], equal_nan=True)
+
+    def check_columns(self, API, array):
+        request = Request(Select("step", [0, 6]), Select("level", [1, 3]), Select("number", [0, 1]))
+        result = API.retrieve(request)
+        columns = tree_to_columns(result, API.datacube)
+        assert len(columns["values"]) == 8
+        for step, level, number, value in zip(columns["step"], columns["level"], columns["number"], columns["values"]):
+            assert array.sel(step=step, level=level, number=number).item() == value
+        return result
+
+    def test_columns_with_dims_in_another_order(self):
+        # the coordinates, and so the axes along the paths, are not in the order of the dimensions of the array
+        array = xr.DataArray(
+            np.arange(2 * 3 * 2, dtype=np.float64).reshape(2, 3, 2),
+            dims=("step", "level", "number"),
+            coords={"number": [0, 1], "level": [1, 2, 3], "step": [0, 6]},
+        )
+        API = Polytope(datacube=array, options={"compressed_axes_config": ["step", "level", "number"]})
+        for bulk_selection in [True, False]:
+            API.datacube.bulk_selection = bulk_selection
+            result = self.check_columns(API, array)
+            leaf = result.leaves[0]
+            assert list(leaf.flatten()) == ["number", "level", "step"]
+            # the result keeps the order of the dimensions of the array
+            assert leaf.result_dims == ("step", "level", "number")
+            assert leaf.result[1].shape == (2, 2, 2)
+
+        # the dimensions of a NumPy array are in the order of its coordinates, whatever the order of its values
+        for dims in [("step", "level", "number"), ("number", "step", "level")]:
+            transposed = array.transpose(*dims)
+            numpy_array = NumpyArray(transposed.values, {dim: transposed[dim].values for dim in dims})
+            API = Polytope(datacube=numpy_array, options={"compressed_axes_config": list(dims)})
+            result = self.check_columns(API, array)
+            assert result.leaves[0].result_dims == dims
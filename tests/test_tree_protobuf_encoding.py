@@ -1,3 +1,6 @@
+import io
+
+import numpy as np
 import pytest
 
 from polytope_feature.datacube.backends.mock import MockDatacube
@@ -9,7 +12,14 @@ from polytope_feature.datacube.datacube_axis import (
     UnsliceableDatacubeAxis,
 )
 from polytope_feature.datacube.tensor_index_tree import TensorIndexTree
-from polytope_feature.datacube.tree_encoding import decode_tree, encode_tree
+from polytope_feature.datacube.tree_encoding import (
+    decode_into_tree,
+    decode_tree,
+    encode_tree,
+    iter_tree_stream,
+    read_tree_stream,
+    write_tree_stream,
+)
 
 
 class TestEncoder:
@@ -70,3 +80,115 @@ class TestEncoder:
         decoded_tree = decode_tree(self.datacube, encoded_bytes)
         decoded_tree.pprint()
         assert decoded_tree.leaves[0].result_size == [1, 1]
+
+
+class TestPackedEncoder:
+    def setup_method(self):
+        self.axes = {}
+        for name in ["step", "latitude", "longitude"]:
+            ax = IntDatacubeAxis()
+            ax.name = name
+            self.axes[name] = ax
+        self.datacube = MockDatacube({"step": 1, "latitude": 1, "longitude": 1})
+        self.datacube._axes = self.axes
+        self.tree = TensorIndexTree()
+        step_node = TensorIndexTree(self.axes["step"], ("0", "6"))
+        self.tree.add_child(step_node)
+        self.lon_nodes = []
+        for lat, lons, indexes in [(10, (1, 2), [[5], [6]]), (20, (3,), [[7]])]:
+            lat_node = TensorIndexTree(self.axes["latitude"], (lat,))
+            lon_node = TensorIndexTree(self.axes["longitude"], lons)
+            step_node.add_child(lat_node)
+            lat_node.add_child(lon_node)
+            lon_node.hide_non_index_nodes(indexes)
+            self.lon_nodes.append(lon_node)
+
+    def test_packed_request(self):
+        encoded_bytes = encode_tree(self.tree, packed=True)
+        decoded_tree = decode_tree(self.datacube, encoded_bytes)
+        assert len(decoded_tree.leaves) == 1
+        leaf = decoded_tree.leaves[0]
+        assert isinstance(leaf.indexes, np.ndarray)
+        assert leaf.indexes.tolist() == [5, 6, 7]
+        assert list(leaf.result_size) == [2]
+        assert list(leaf.indexes_size) == [1, 1]
+        assert len(leaf.result) == 0
+        assert decode_tree(self.datacube, encode_tree(self.tree)).leaves[0].indexes == [5, 6, 7]
+
+    @pytest.mark.parametrize("packed", [True, False])
+    def test_decode_into_tree(self, packed):
+        self.lon_nodes[0].result = [1.0, 2.0, 3.0, None]
+        self.lon_nodes[1].result = [5.0, 6.0]
+        encoded_bytes = encode_tree(self.tree, packed=packed)
+        for lon_node in self.lon_nodes:
+            lon_node.result = []
+        decode_into_tree(self.tree, encoded_bytes)
+        assert np.array_equal(self.lon_nodes[0].result, [1.0, 2.0, 3.0, np.nan], equal_nan=True)
+        assert np.array_equal(self.lon_nodes[1].result, [5.0, 6.0])
+        if packed:
+            assert isinstance(self.lon_nodes[0].result, np.ndarray)
+            assert self.lon_nodes[0].result.base is self.lon_nodes[1].result.base
+
+
+class ShortReadStream:
+    # Returns at most a few bytes per read, like a socket
+    def __init__(self, data):
+        self.stream = io.BytesIO(data)
+
+    def read(self, size):
+        return self.stream.read(min(size, 7))
+
+
+class TestTreeStream:
+    def setup_method(self):
+        self.axes = {}
+        for name in ["date", "step", "latitude", "longitude"]:
+            ax = IntDatacubeAxis()
+            ax.name = name
+            self.axes[name] = ax
+        self.datacube = MockDatacube({"date": 1, "step": 1, "latitude": 1, "longitude": 1})
+        self.datacube._axes = self.axes
+        self.tree = TensorIndexTree()
+        index = 0
+        for date in ["20240101", "20240102", "20240103"]:
+            date_node = TensorIndexTree(self.axes["date"], (date,))
+            self.tree.add_child(date_node)
+            for step in range(5):
+                step_node = TensorIndexTree(self.axes["step"], (str(step), str(step + 6)))
+                date_node.add_child(step_node)
+                lat_node = TensorIndexTree(self.axes["latitude"], (10,))
+                lon_node = TensorIndexTree(self.axes["longitude"], (1,))
+                step_node.add_child(lat_node)
+                lat_node.add_child(lon_node)
+                lon_node.result = [float(index), float(index + 1)]
+                lon_node.hide_non_index_nodes([[index]])
+                index += 1
+
+    def leaf_contents(self, tree):
+        return [
+            (tuple(n.values[0] for n in path), list(leaf.indexes), list(leaf.result))
+            for leaf, path in tree.iter_leaves()
+        ]
+
+    def test_encode_all_children(self):
+        decoded_tree = decode_tree(self.datacube, encode_tree(self.tree))
+        assert len(decoded_tree.leaves) == 15
+
+    @pytest.mark.parametrize("max_chunk_nodes", [1, 3, 100])
+    def test_stream_round_trip(self, max_chunk_nodes):
+        stream = io.BytesIO()
+        write_tree_stream(self.tree, stream, max_chunk_nodes=max_chunk_nodes)
+        expected = self.leaf_contents(decode_tree(self.datacube, encode_tree(self.tree)))
+
+        chunks = list(iter_tree_stream(self.datacube, io.BytesIO(stream.getvalue())))
+        assert len(chunks) == (15 if max_chunk_nodes < 6 else 3)
+
+        decoded_tree = read_tree_stream(self.datacube, ShortReadStream(stream.getvalue()))
+        assert self.leaf_contents(decoded_tree) == expected
+        assert expected[4] == (("20240101", "4"), [4], [4.0, 5.0])
+
+    def test_truncated_stream(self):
+        stream = io.BytesIO()
+        write_tree_stream(self.tree, stream)
+        with pytest.raises(EOFError):
+            read_tree_stream(self.datacube, io.BytesIO(stream.getvalue()[:-20]))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xarray as xr
+
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Select
+
+
+class TestXarrayAxisIndexes:
+    def setup_method(self, method):
+        array = xr.DataArray(
+            np.random.randn(3, 6, 19, 36),
+            dims=("date", "step", "latitude", "longitude"),
+            coords={
+                "date": pd.date_range("2000-01-01", "2000-01-03", 3),
+                "step": [0, 3, 6, 9, 12, 15],
+                "latitude": np.linspace(90, -90, 19),
+                "longitude": np.arange(0, 360, 10.0),
+                "number": 1,
+            },
+        )
+        options = {
+            "axis_config": [
+                {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+                {"axis_name": "longitude", "transformations": [{"name": "cyclic", "range": [0, 360]}]},
+            ],
+            "compressed_axes_config": ["date", "step", "latitude", "longitude", "number"],
+        }
+        self.API = Polytope(datacube=array, options=options)
+
+    def test_dimension_indexes_are_cached(self):
+        indexes = self.API.datacube.path_independent_indexes
+        assert sorted(indexes) == ["date", "latitude", "longitude", "step"]
+        assert indexes["step"].equals(pd.Index([0, 3, 6, 9, 12, 15]))
+        # the scalar coordinate is not a dimension, so it is still selected
+        assert "number" not in indexes
+
+    def test_box_without_selection(self, monkeypatch):
+        selected_axes = []
+        select = self.API.datacube.select
+
+        def select_scalar_coordinates(path, unmapped_path):
+            selected_axes.append(list(path))
+            return select(path, unmapped_path)
+
+        monkeypatch.setattr(self.API.datacube, "select", select_scalar_coordinates)
+        request = Request(
+            Select("date", [pd.Timestamp("2000-01-02")]),
+            Select("step", [3, 9]),
+            Select("number", [1]),
+            Box(["latitude", "longitude"], [-15, 0], [25, 20]),
+        )
+        result = self.API.retrieve(request)
+        # only the lookups of the number axis select a subarray
+        assert len(selected_axes) == 1
+        leaf = result.leaves[0]
+        assert leaf.result[1].shape == (1, 2, 4, 3)
+        labels = {key: list(values) for key, values in leaf.flatten().items() if key != "number"}
+        assert np.array_equal(leaf.result[1], self.API.datacube.dataarray.sel(labels).values)
+
+    @pytest.mark.parametrize("axis", ["date", "step"])
+    def test_indexes_match_selection(self, axis):
+        datacube = self.API.datacube
+        indexes = datacube.path_independent_indexes.pop(axis)
+        path = {"date": (pd.Timestamp("2000-01-03"),)} if axis == "step" else {}
+        assert datacube._axes[axis].find_standard_indexes(path, datacube).equals(indexes)
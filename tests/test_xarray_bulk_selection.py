@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Point, Select, Union
+
+
+class TestXarrayBulkSelection:
+    def setup_method(self, method):
+        # Create a dataarray with string, timedelta, integer and float axes
+        array = xr.DataArray(
+            np.arange(2 * 3 * 4 * 19 * 36, dtype=np.float32).reshape(2, 3, 4, 19, 36),
+            dims=("param", "step", "number", "latitude", "longitude"),
+            coords={
+                "param": ["2t", "10u"],
+                "step": pd.to_timedelta([0, 3, 6], unit="h"),
+                "number": [0, 1, 2, 3],
+                "latitude": np.linspace(90, -90, 19),
+                "longitude": np.arange(0, 360, 10.0),
+            },
+            name="data",
+        )
+        options = {
+            "axis_config": [
+                {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+                {"axis_name": "longitude", "transformations": [{"name": "cyclic", "range": [0, 360]}]},
+            ],
+            "compressed_axes_config": ["longitude", "latitude", "number", "step", "param"],
+        }
+        self.API = Polytope(datacube=array, options=options)
+
+    def retrieve_per_leaf(self, request):
+        self.API.datacube.bulk_selection = False
+        try:
+            return self.API.retrieve(request)
+        finally:
+            self.API.datacube.bulk_selection = True
+
+    def check_same_results(self, request):
+        result = self.API.retrieve(request)
+        expected = self.retrieve_per_leaf(request)
+        assert len(result.leaves) == len(expected.leaves)
+        for leaf, expected_leaf in zip(result.leaves, expected.leaves):
+            assert leaf.result[0] == expected_leaf.result[0] == "data"
+            assert leaf.result[1].shape == expected_leaf.result[1].shape
+            assert leaf.result[1].dtype == expected_leaf.result[1].dtype
+            assert np.array_equal(leaf.result[1], expected_leaf.result[1])
+        return result
+
+    def test_box(self):
+        request = Request(
+            Select("param", ["2t", "10u"]),
+            Select("step", [pd.Timedelta(hours=0), pd.Timedelta(hours=6)]),
+            Select("number", [1, 3]),
+            Box(["latitude", "longitude"], [-20, -30], [40, 30]),
+        )
+        result = self.check_same_results(request)
+        # 2 params, 2 steps, 2 numbers, 7 latitudes and 7 longitudes
+        assert sum(leaf.result[1].size for leaf in result.leaves) == 2 * 2 * 2 * 7 * 7
+
+    def test_nearest_points(self):
+        request = Request(
+            Select("param", ["10u"]),
+            Select("step", [pd.Timedelta(hours=3)]),
+            Select("number", [2]),
+            Union(
+                ["latitude", "longitude"],
+                Point(["latitude", "longitude"], [[11, 4]], method="nearest"),
+                Point(["latitude", "longitude"], [[-52, 358]], method="nearest"),
+            ),
+        )
+        result = self.check_same_results(request)
+        array = self.API.datacube.dataarray
+        for leaf in result.leaves:
+            labels = {key: list(values) for key, values in leaf.flatten().items()}
+            assert np.array_equal(leaf.result[1], array.sel(labels).values)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from polytope_feature.polytope import Polytope, Request
+from polytope_feature.shapes import Box, Point, Select, Union
+
+dask = pytest.importorskip("dask")
+from dask.callbacks import Callback  # noqa: E402
+
+
+class ComputeCounter(Callback):
+    def __init__(self):
+        super().__init__()
+        self.computes = 0
+
+    def _start(self, dsk):
+        self.computes += 1
+
+
+class TestXarrayDaskSelection:
+    def setup_method(self, method):
+        array = xr.DataArray(
+            np.random.randn(3, 19, 36),
+            dims=("step", "latitude", "longitude"),
+            coords={
+                "step": [0, 3, 6],
+                "latitude": np.linspace(90, -90, 19),
+                "longitude": np.arange(0, 360, 10.0),
+            },
+            name="data",
+        )
+        self.options = {
+            "axis_config": [
+                {"axis_name": "latitude", "transformations": [{"name": "reverse", "is_reverse": True}]},
+                {"axis_name": "longitude", "transformations": [{"name": "cyclic", "range": [0, 360]}]},
+            ],
+            "compressed_axes_config": ["step"],
+        }
+        self.array = array
+        chunked_array = array.chunk({"step": 1, "latitude": 5, "longitude": 7})
+        self.chunked_API = Polytope(datacube=chunked_array, options=self.options)
+        self.API = Polytope(datacube=array, options=self.options)
+
+    def check_same_results(self, request):
+        with ComputeCounter() as counter:
+            result = self.chunked_API.retrieve(request)
+        # the values of the whole tree are computed at once
+        assert counter.computes == 1
+        expected = self.API.retrieve(request)
+        assert len(result.leaves) == len(expected.leaves)
+        for leaf, expected_leaf in zip(result.leaves, expected.leaves):
+            assert leaf.result[0] == expected_leaf.result[0]
+            assert leaf.result[1].shape == expected_leaf.result[1].shape
+            assert np.array_equal(leaf.result[1], expected_leaf.result[1])
+
+    def test_box(self):
+        request = Request(
+            Select("step", [0, 6]),
+            Box(["latitude", "longitude"], [-35, -45], [50, 70]),
+        )
+        self.check_same_results(request)
+
+    def test_points(self):
+        request = Request(
+            Select("step", [3]),
+            Union(
+                ["latitude", "longitude"],
+                Point(["latitude", "longitude"], [[11, 4]], method="nearest"),
+                Point(["latitude", "longitude"], [[-82, 185]], method="nearest"),
+            ),
+        )
+        self.check_same_results(request)